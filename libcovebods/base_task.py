@@ -6,10 +6,21 @@ class AdditionalCheck:
     This means in __init__ you can set up any storage you need, knowing that it will be used.
     """
 
+    # Set to True to be given the shared RecordIndex (see libcovebods.record_index) in self._record_index,
+    # instead of building your own lookups of records.
+    # It is filled in during the first pass: each statement is added to it before any first pass hooks are called
+    # for that statement, so in the first pass it has the current statement and the ones before it.
+    # The full index (every statement in the data) is only there in the second pass and final checks.
+    uses_record_index = False
+
     def __init__(self, lib_cove_bods_config, schema_object):
         self._additional_check_results = []
         self._lib_cove_bods_config = lib_cove_bods_config
         self._schema_object = schema_object
+        self._record_index = None
+
+    def set_record_index(self, record_index):
+        self._record_index = record_index
 
     @staticmethod
     def get_additional_check_types_possible(
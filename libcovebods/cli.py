@@ -1,5 +1,6 @@
 import argparse
 import json
+import sys
 
 import libcovebods.additionalfields
 import libcovebods.config
@@ -9,6 +10,17 @@ import libcovebods.run_tasks
 import libcovebods.schema
 
 
+def report_parse_errors(data_reader) -> bool:
+    """Prints any lines of JSON Lines input that could not be parsed, and returns True if there were any."""
+    parse_errors = data_reader.get_parse_errors()
+    for parse_error in parse_errors:
+        print(
+            f"Line {parse_error['line']} could not be parsed: {parse_error['message']}",
+            file=sys.stderr,
+        )
+    return bool(parse_errors)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Lib Cove BODS CLI")
     subparsers = parser.add_subparsers(dest="subparser_name")
@@ -19,7 +31,8 @@ def main():
         help="Check that data conforms to normative rules specified in BODS",
     )
     python_validate_parser.add_argument(
-        "inputfilename", help="File name of an input JSON data file"
+        "inputfilename",
+        help="File name of an input JSON or JSON Lines data file, which may be compressed with gzip, bz2 or xz",
     )
 
     additional_fields_parser = subparsers.add_parser(
@@ -28,21 +41,25 @@ def main():
         help="Report additional fields not specified in the schema",
     )
     additional_fields_parser.add_argument(
-        "inputfilename", help="File name of an input JSON data file"
+        "inputfilename",
+        help="File name of an input JSON or JSON Lines data file, which may be compressed with gzip, bz2 or xz",
     )
 
     json_schema_validate_parser = subparsers.add_parser(
         "jsonschemavalidate", aliases=["jsv"], help="Validate data against the schema"
     )
     json_schema_validate_parser.add_argument(
-        "inputfilename", help="File name of an input JSON data file"
+        "inputfilename",
+        help="File name of an input JSON or JSON Lines data file, which may be compressed with gzip, bz2 or xz",
     )
 
     args = parser.parse_args()
 
     if args.subparser_name == "pythonvalidate" or args.subparser_name == "pv":
 
-        data_reader = libcovebods.data_reader.DataReader(args.inputfilename)
+        data_reader = libcovebods.data_reader.DataReader(
+            args.inputfilename, pause_gc=True
+        )
         config = libcovebods.config.LibCoveBODSConfig()
         schema = libcovebods.schema.SchemaBODS(data_reader, config)
         output_data = libcovebods.run_tasks.process_additional_checks(
@@ -51,9 +68,14 @@ def main():
 
         print(json.dumps(output_data, indent=4))
 
+        if report_parse_errors(data_reader):
+            sys.exit(1)
+
     elif args.subparser_name == "additionalfields" or args.subparser_name == "af":
 
-        data_reader = libcovebods.data_reader.DataReader(args.inputfilename)
+        data_reader = libcovebods.data_reader.DataReader(
+            args.inputfilename, pause_gc=True
+        )
         config = libcovebods.config.LibCoveBODSConfig()
         schema = libcovebods.schema.SchemaBODS(data_reader, config)
         validator = libcovebods.additionalfields.AdditionalFields(schema)
@@ -62,9 +84,14 @@ def main():
 
         print(json.dumps(output, indent=4))
 
+        if report_parse_errors(data_reader):
+            sys.exit(1)
+
     elif args.subparser_name == "jsonschemavalidate" or args.subparser_name == "jsv":
 
-        data_reader = libcovebods.data_reader.DataReader(args.inputfilename)
+        data_reader = libcovebods.data_reader.DataReader(
+            args.inputfilename, pause_gc=True
+        )
         config = libcovebods.config.LibCoveBODSConfig()
         schema = libcovebods.schema.SchemaBODS(data_reader, config)
         validator = libcovebods.jsonschemavalidate.JSONSchemaValidator(schema)
@@ -75,6 +102,9 @@ def main():
 
         print(json.dumps(output_json, indent=4))
 
+        if report_parse_errors(data_reader):
+            sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,78 @@
+import sys
+
+# Keys whose values come from a small set (codelists, scheme codes, versions), so are worth interning.
+# Other values (ids, names, dates) are mostly different in every statement, so interning them saves nothing.
+INTERNED_VALUE_KEYS = frozenset(
+    (
+        "bodsVersion",
+        "directOrIndirect",
+        "entityType",
+        "interestLevel",
+        "personType",
+        "recordStatus",
+        "recordType",
+        "scheme",
+        "statementType",
+        "subtype",
+        "type",
+    )
+)
+
+
+class ReadOnlyDict(dict):
+    """A dict that can't be changed. It is still a dict, so all code that reads statements works with it."""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Statements are read only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only  # type: ignore
+    clear = pop = popitem = setdefault = update = _read_only  # type: ignore
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+class ReadOnlyList(list):
+    """A list that can't be changed. It is still a list, so all code that reads statements works with it."""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Statements are read only")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only  # type: ignore
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only  # type: ignore
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+
+def compact_statement(value, freeze=False):
+    """Returns a copy of a parsed statement (or any JSON value) that uses less memory.
+
+    Every key, and the values of keys in INTERNED_VALUE_KEYS, are interned, so that all statements share
+    one copy of each instead of each having its own. Lists are made exactly as long as they need to be.
+    With freeze, dicts and lists are made into ReadOnlyDict and ReadOnlyList.
+
+    Making the copy is slow: it makes loading a file about twice as slow (see DataReader's intern_strings)."""
+    if type(value) is dict or type(value) is ReadOnlyDict:
+        out = {}
+        for key, item in value.items():
+            if type(item) is str:
+                if key in INTERNED_VALUE_KEYS:
+                    item = sys.intern(item)
+            elif type(item) is dict or type(item) is list:
+                item = compact_statement(item, freeze)
+            out[sys.intern(key) if type(key) is str else key] = item
+        return ReadOnlyDict(out) if freeze else out
+    elif type(value) is list or type(value) is ReadOnlyList:
+        # Copying the list with list() makes it exactly as long as it needs to be
+        # (building it up, as the JSON parser does, leaves room for more items)
+        out_list = list(value)
+        for index, item in enumerate(out_list):
+            if type(item) is dict or type(item) is list:
+                out_list[index] = compact_statement(item, freeze)
+        return ReadOnlyList(out_list) if freeze else out_list
+    return value
@@ -1,7 +1,81 @@
+import bz2
+import contextlib
+import gc
+import gzip
+import io
 import json
+import lzma
+import mmap
+import os
+import random
+from array import array
+from decimal import Decimal
 
 import ijson  # type: ignore
 
+from libcovebods.compact_statements import compact_statement
+from libcovebods.json_backends import JSON_BACKEND_AUTO, get_json_backend
+from libcovebods.statement_index import (
+    STATEMENT_INDEX_SUFFIX,
+    UTF8_BOM,
+    find_json_array_item_at,
+    find_json_lines_item_at,
+    iter_json_array_items,
+    iter_json_array_spans,
+    iter_json_lines_spans,
+    line_number_at,
+    load_statement_index,
+    save_statement_index,
+)
+
+INPUT_FORMAT_AUTO = "auto"
+INPUT_FORMAT_JSON = "json"
+INPUT_FORMAT_JSON_LINES = "jsonl"
+
+TOP_LEVEL_TYPE_ARRAY = "array"
+TOP_LEVEL_TYPE_OBJECT = "object"
+
+# The first character of a JSON value tells us its type
+_TOP_LEVEL_TYPES_BY_FIRST_BYTE = {
+    b"[": TOP_LEVEL_TYPE_ARRAY,
+    b"{": TOP_LEVEL_TYPE_OBJECT,
+    b'"': "string",
+    b"t": "boolean",
+    b"f": "boolean",
+    b"n": "null",
+    b"-": "number",
+    **{str(digit).encode(): "number" for digit in range(10)},
+}
+
+COMPRESSION_NONE = None
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_BZ2 = "bz2"
+COMPRESSION_XZ = "xz"
+
+# Magic bytes at the start of compressed files, and how to open them
+_COMPRESSION_FORMATS = (
+    (b"\x1f\x8b", COMPRESSION_GZIP, gzip.open),
+    (b"BZh", COMPRESSION_BZ2, bz2.open),
+    (b"\xfd7zXZ\x00", COMPRESSION_XZ, lzma.open),
+)
+
+SAMPLE_MODE_METHOD_FIRST = "first"
+SAMPLE_MODE_METHOD_RESERVOIR = "reservoir"
+SAMPLE_MODE_METHOD_JUMP = "jump"
+
+# Values of recordStatus that get_full_file_counts() counts
+_RECORD_STATUSES = ("new", "updated", "closed")
+
+# Statement types that are sampled separately. Anything else is sampled together as "unknown".
+_SAMPLE_MODE_STATEMENT_TYPES = (
+    "entityStatement",
+    "personStatement",
+    "ownershipOrControlStatement",
+)
+
+# In jump sample mode, how many random places in the file to look at for each statement we want
+_SAMPLE_MODE_JUMPS_PER_STATEMENT = 4
+
 STATEMENT_MAPPING = {
     "entity": "entityStatement",
     "person": "personStatement",
@@ -24,9 +98,65 @@ class DataReader:
 
     This is then passed around to any code that wants access to data.
 
-    This is done so that later we can add a get_iterator() function here
-    that returns statements in a memory efficient way and code that can use
-    an iterator (like Python Checks) can call get_iterator() and not get_all_data()
+    Code that can use an iterator (like Python Checks) should call get_iterator() and not get_all_data().
+    In streaming mode get_iterator() reads the statements from the file one at a time each time it is called,
+    so memory use does not depend on the size of the file.
+
+    The input can be a JSON array of statements or JSON Lines (one statement per line).
+    By default the format is worked out from the start of the file.
+
+    filename is usually the name of a file, but the input can also be passed in directly as bytes, a bytearray,
+    a memoryview or a file-like object (which is read into memory once), or as a list of statements that have
+    already been parsed. All modes work the same way with all of these.
+
+    The input may be compressed with gzip, bz2 or xz; this is detected from the first bytes of the file
+    and it is decompressed as it is read, so there is no need to decompress it to disk first.
+
+    With use_mmap, uncompressed files are memory-mapped rather than read with normal file calls.
+    ijson_backend can be set to force a particular ijson backend (eg "yajl2_c" or "python").
+    get_metadata() reports which ijson backend was actually used.
+
+    json_backend picks what parses whole files, JSON Lines lines and indexed statements
+    (see libcovebods.json_backends). By default this is the fastest one installed (eg orjson),
+    but all backends give exactly the same results as the json module in the standard library.
+
+    With use_statement_index, the first read of an uncompressed file also records the start and end byte offset
+    of every statement. Later reads (eg the second pass in streaming mode) and get_statement() then go straight to
+    the bytes they need. With save_statement_index the offsets are saved next to the file
+    (with STATEMENT_INDEX_SUFFIX added to the file name) and reused next time, as long as the file has not changed.
+
+    In sample mode, sample_mode_method picks how up to sample_mode_max_row_count_per_statement_type statements
+    of each statement type are chosen:
+
+    * SAMPLE_MODE_METHOD_FIRST (the default) takes the first ones in the file.
+      This is quick, but if the file is sorted (eg by date) the sample will not be typical of the whole file.
+    * SAMPLE_MODE_METHOD_RESERVOIR takes a random sample of the whole file, in one pass,
+      holding only the sample in memory.
+    * SAMPLE_MODE_METHOD_JUMP jumps to random places in an uncompressed file and takes the statement found there,
+      so a huge file can be sampled without reading all of it. The sample is only roughly random
+      (statements that follow long ones are more likely to be picked) unless a statement index is used.
+      Compressed files can't be jumped around in, so they are sampled with SAMPLE_MODE_METHOD_RESERVOIR.
+
+    sample_mode_seed seeds the random choices, so the same sample can be taken again.
+    Samples are always returned in the order the statements are in the file.
+
+    With intern_strings, keys and the values of keys like recordType and scheme (see
+    libcovebods.compact_statements) are shared between all statements rather than each statement having its own
+    copies, which uses a lot less memory for large files. In full mode, each statement is made compact
+    as it is parsed, so the whole file is never held in its bigger form. freeze_statements does the same,
+    and also makes the statements read only (as ReadOnlyDict and ReadOnlyList, which are still dicts and lists).
+    Both are off by default, as every statement is copied as it is read: loading takes about twice as long
+    (an 88MB file went from 2.4s to 4.7s with intern_strings and 5.2s with freeze_statements), for about 40% less
+    peak memory (620MB to 365MB). Only use them when memory matters more than time.
+
+    With pause_gc, the cyclic garbage collector is turned off while full mode parses the input. Parsed JSON
+    has no reference cycles for it to free, but it goes through all the new objects again and again as they
+    are made, so this can halve the time a large file takes to load. It turns the collector off for the whole
+    process, including any other threads, so only use it when nothing else is running (eg from the command line).
+
+    The input is only parsed once; every consumer that calls get_all_data() gets
+    the same object back, so they must treat it as read only.
+    Call release() when all consumers are finished to free the memory.
     """
 
     def __init__(
@@ -34,16 +164,295 @@ class DataReader:
         filename,
         sample_mode=False,
         sample_mode_max_row_count_per_statement_type=50,
+        streaming_mode=False,
+        input_format=INPUT_FORMAT_AUTO,
+        use_mmap=False,
+        ijson_backend=None,
+        use_statement_index=False,
+        save_statement_index=False,
+        sample_mode_method=SAMPLE_MODE_METHOD_FIRST,
+        sample_mode_seed=None,
+        json_backend=JSON_BACKEND_AUTO,
+        intern_strings=False,
+        freeze_statements=False,
+        pause_gc=False,
     ):
-        self._filename = filename
+        self._filename = None
+        # For input passed in as bytes (or something we have read into bytes)
+        self._data = None
+        # For input passed in as already parsed statements
+        self._statements = None
+        if isinstance(filename, list):
+            self._statements = filename
+            input_format = INPUT_FORMAT_JSON
+        elif isinstance(filename, (bytes, bytearray)):
+            self._data = filename
+        elif isinstance(filename, memoryview):
+            self._data = filename.tobytes()
+        elif hasattr(filename, "read"):
+            # We need to read the input more than once, and not all file-like objects can seek
+            data = filename.read()
+            self._data = data.encode("utf-8") if isinstance(data, str) else data
+        else:
+            self._filename = filename
         self._sample_mode = sample_mode
         self._sample_mode_max_row_count_per_statement_type = (
             sample_mode_max_row_count_per_statement_type
         )
+        self._sample_mode_method = sample_mode_method
+        self._sample_mode_seed = sample_mode_seed
+        self._streaming_mode = streaming_mode
+        self._input_format = input_format
+        self._parse_errors: list = []
+        self._use_mmap = use_mmap
+        # If no backend is asked for, ijson picks the fastest one available
+        self._ijson = (
+            ijson if ijson_backend is None else ijson.get_backend(ijson_backend)
+        )
+        self._ijson_backend_used = None
+        self._json_backend = get_json_backend(json_backend)
+        self._compact_statements = intern_strings or freeze_statements
+        self._freeze_statements = freeze_statements
+        self._pause_gc = pause_gc
+        self._use_statement_index = use_statement_index
+        self._save_statement_index = save_statement_index
+        self._statement_offsets = None
+        self._saved_statement_index_checked = False
+        self._compression_detected = False
+        self._compression = COMPRESSION_NONE
+        self._full_file_counts = None
+        self._all_data = None
+        self._all_data_loaded = False
+        # How many times the input has been parsed. Tests can assert on this.
+        self.parse_count = 0
 
     def get_all_data(self):
+        """Returns all the data (or the sample in sample mode), parsing the input the first time only."""
+        if not self._all_data_loaded:
+            self._all_data = self._load_all_data()
+            self._all_data_loaded = True
+            self.parse_count += 1
+        return self._all_data
+
+    def get_iterator(self):
+        """Yields each statement in turn.
+
+        If the data is not a list, it is yielded as a single statement so that checks can be run
+        (JSON Schema validation will handle reporting the error).
+
+        In streaming mode (and not sample mode) the file is read again every time this is called,
+        unless get_all_data() has already been called, in which case that data is reused."""
+        if self._streaming_mode and not self._sample_mode and not self._all_data_loaded:
+            self.parse_count += 1
+            # use_float matches the number types json.load gives us in full mode
+            yield from self._iter_source(use_float=True, whole_value_if_not_array=True)
+        else:
+            all_data = self.get_all_data()
+            if isinstance(all_data, list):
+                yield from all_data
+            else:
+                yield all_data
+
+    def get_top_level_type(self):
+        """Returns the JSON type of what get_all_data() would return (eg TOP_LEVEL_TYPE_ARRAY),
+        by looking at the start of the input only. Returns None if the input is empty.
+
+        JSON Lines data is always an array of statements.
+        In sample mode, this is still the type of the input (not of the sample, which is always a list),
+        so that input that isn't a list of statements is not mistaken for an empty one."""
+        if self._all_data_loaded and not self._sample_mode:
+            if isinstance(self._all_data, list):
+                return TOP_LEVEL_TYPE_ARRAY
+            elif isinstance(self._all_data, dict):
+                return TOP_LEVEL_TYPE_OBJECT
+        if (
+            self._statements is not None
+            or self.get_input_format() == INPUT_FORMAT_JSON_LINES
+        ):
+            return TOP_LEVEL_TYPE_ARRAY
+        with self._open() as fp:
+            return _TOP_LEVEL_TYPES_BY_FIRST_BYTE.get(_skip_bom_and_whitespace(fp)[:1])
+
+    def peek_first_statement(self):
+        """Returns the first statement (what get_all_data()[0] would be), reading as little of the input as possible.
+
+        Returns None if there are no statements, or if the data is not an array."""
+        if self._all_data_loaded:
+            if isinstance(self._all_data, list) and self._all_data:
+                return self._all_data[0]
+            return None
+        if self.get_top_level_type() != TOP_LEVEL_TYPE_ARRAY:
+            return None
+        if self._sample_mode and self._sample_mode_max_row_count_per_statement_type < 1:
+            return None
+        if self._sample_mode and self._sample_mode_method != SAMPLE_MODE_METHOD_FIRST:
+            # Which statement is first depends on the whole sample
+            sample_data = self.get_all_data()
+            return sample_data[0] if sample_data else None
+        # Use the same number types as get_all_data() would
+        statements = self._iter_source(use_float=not self._sample_mode)
+        try:
+            return next(statements, None)
+        finally:
+            # Stop reading now; this also stops a partial statement index being kept
+            statements.close()
+
+    def get_full_file_counts(self) -> dict:
+        """Returns counts of statement types, record types and record statuses in the whole file,
+        even in sample mode, and the size of the file in bytes.
+
+        In sample mode (or streaming mode) this reads the whole file, but only counts; no statements are kept.
+        The result is cached, so the file is only read for this once."""
+        if self._full_file_counts is None:
+            if self._all_data_loaded and not self._sample_mode:
+                all_data = self._all_data
+                statements = iter(all_data if isinstance(all_data, list) else [])
+            else:
+                self.parse_count += 1
+                statements = self._iter_source(use_float=True, compact=False)
+            count_statement_types = {
+                "entityStatement": 0,
+                "personStatement": 0,
+                "ownershipOrControlStatement": 0,
+                "unknown": 0,
+            }
+            count_record_types = {record_type: 0 for record_type in STATEMENT_MAPPING}
+            count_record_statuses = {
+                record_status: 0 for record_status in _RECORD_STATUSES
+            }
+            count_statements = 0
+            for statement in statements:
+                count_statements += 1
+                statement_type = get_statement_type(statement)
+                if statement_type in count_statement_types:
+                    count_statement_types[statement_type] += 1
+                else:
+                    count_statement_types["unknown"] += 1
+                if isinstance(statement, dict):
+                    record_type = statement.get("recordType")
+                    if (
+                        isinstance(record_type, str)
+                        and record_type in count_record_types
+                    ):
+                        count_record_types[record_type] += 1
+                    record_status = statement.get("recordStatus")
+                    if (
+                        isinstance(record_status, str)
+                        and record_status in count_record_statuses
+                    ):
+                        count_record_statuses[record_status] += 1
+            self._full_file_counts = {
+                "count_statements": count_statements,
+                "count_statement_types": count_statement_types,
+                "count_record_types": count_record_types,
+                "count_record_statuses": count_record_statuses,
+                "file_size_bytes": self._get_size(),
+            }
+        return self._full_file_counts
+
+    def get_input_format(self) -> str:
+        """Returns INPUT_FORMAT_JSON or INPUT_FORMAT_JSON_LINES.
+
+        If the reader was created with input_format="auto" this looks at the start of the file to decide."""
+        if self._input_format == INPUT_FORMAT_AUTO:
+            with self._open() as fp:
+                self._input_format = _detect_input_format(fp)
+        return self._input_format
+
+    def get_compression(self):
+        """Returns the compression used by the input (COMPRESSION_GZIP, COMPRESSION_BZ2 or COMPRESSION_XZ),
+        or COMPRESSION_NONE."""
+        if not self._compression_detected and self._statements is not None:
+            self._compression_detected = True
+        if not self._compression_detected:
+            if self._data is not None:
+                magic = self._data[:6]
+            else:
+                with open(self._filename, "rb") as fp:
+                    magic = fp.read(6)
+            for magic_bytes, compression, _ in _COMPRESSION_FORMATS:
+                if magic.startswith(magic_bytes):
+                    self._compression = compression
+                    break
+            self._compression_detected = True
+        return self._compression
+
+    def get_metadata(self) -> dict:
+        """Returns information about how the input was read."""
+        return {
+            "input_format": self.get_input_format(),
+            "compression": self.get_compression(),
+            "mmap": self._use_mmap
+            and self._filename is not None
+            and self.get_compression() == COMPRESSION_NONE,
+            # None if ijson has not been used (eg full mode JSON is parsed with the json module)
+            "ijson_backend": self._ijson_backend_used,
+            "json_backend": self._json_backend.name,
+            "statement_index": self._statement_offsets is not None,
+            "sample_mode_method": self._sample_mode_method
+            if self._sample_mode
+            else None,
+            # Lines of JSON Lines input that could not be parsed (see get_parse_errors())
+            "parse_errors": list(self._parse_errors),
+        }
+
+    def get_statement_offsets(self):
+        """Returns the byte offsets of the statements, as an array of int64s: [start, end, start, end, ...].
+
+        For JSON Lines data, there is an entry for every line with something on it.
+        Returns None if a statement index can't be used with this input (eg it's compressed, or not a JSON array).
+        This reads the whole file if it has not been indexed yet, but does not keep the statements."""
+        if self._statement_offsets is None and self._can_use_statement_index():
+            offsets = array("q")
+            with self._open_buffer() as buffer:
+                for start, end in self._iter_spans(buffer):
+                    offsets.append(start)
+                    offsets.append(end)
+            self._set_statement_offsets(offsets)
+        return self._statement_offsets
+
+    def get_statement(self, index):
+        """Returns one statement, by position (starting at 0), reading only the bytes needed."""
+        offsets = self.get_statement_offsets()
+        if offsets is None:
+            raise ValueError("A statement index can not be used with this input")
+        with self._open_buffer() as buffer:
+            return self._compact(
+                self._json_backend.loads(
+                    buffer[offsets[index * 2] : offsets[index * 2 + 1]]
+                )
+            )
+
+    def get_parse_errors(self) -> list:
+        """Returns a list of lines that could not be parsed the last time JSON Lines input was read.
+
+        Each item is a dict with "line" (the line number, starting at 1) and "message" keys.
+        Lines that can't be parsed are skipped; they do not stop the rest of the file being read.
+        They are also in get_metadata() (and so in the output of process_additional_checks),
+        and the CLI prints them and exits with status 1."""
+        return self._parse_errors
+
+    def release(self):
+        """Frees the parsed data. If get_all_data() is called again, the input will be parsed again."""
+        self._all_data = None
+        self._all_data_loaded = False
+
+    def _load_all_data(self):
         # Which mode?
-        if self._sample_mode:
+        if self._sample_mode and self._sample_mode_method == SAMPLE_MODE_METHOD_JUMP:
+
+            # Sample Mode, jumping to random places in the file
+            return self._load_sample_by_jumping()
+
+        elif (
+            self._sample_mode
+            and self._sample_mode_method == SAMPLE_MODE_METHOD_RESERVOIR
+        ):
+
+            # Sample Mode, random sample of the whole file
+            return self._load_sample_reservoir(self._iter_source(use_float=False))
+
+        elif self._sample_mode:
 
             # Sample Mode
             sample_data = []
@@ -54,38 +463,423 @@ class DataReader:
             }
             count_unknown_statement_types = 0
 
-            with open(self._filename, "rb") as fp:
-                for statement in ijson.items(fp, "item"):
-                    statementType = get_statement_type(statement)
-                    if statementType in count_statement_types:
-                        if (
-                            count_statement_types[statementType]
-                            < self._sample_mode_max_row_count_per_statement_type
-                        ):
-                            sample_data.append(statement)
-                            count_statement_types[statementType] += 1
-                    else:
-                        if (
-                            count_unknown_statement_types
-                            < self._sample_mode_max_row_count_per_statement_type
-                        ):
-                            sample_data.append(statement)
-                            count_unknown_statement_types += 1
+            for statement in self._iter_source(use_float=False):
+                statementType = get_statement_type(statement)
+                if statementType in count_statement_types:
                     if (
-                        not count_unknown_statement_types
+                        count_statement_types[statementType]
                         < self._sample_mode_max_row_count_per_statement_type
-                        and not [
-                            True
-                            for k, v in count_statement_types.items()
-                            if v < self._sample_mode_max_row_count_per_statement_type
-                        ]
                     ):
-                        break
+                        sample_data.append(statement)
+                        count_statement_types[statementType] += 1
+                else:
+                    if (
+                        count_unknown_statement_types
+                        < self._sample_mode_max_row_count_per_statement_type
+                    ):
+                        sample_data.append(statement)
+                        count_unknown_statement_types += 1
+                if (
+                    not count_unknown_statement_types
+                    < self._sample_mode_max_row_count_per_statement_type
+                    and not [
+                        True
+                        for k, v in count_statement_types.items()
+                        if v < self._sample_mode_max_row_count_per_statement_type
+                    ]
+                ):
+                    break
 
             return sample_data
 
+        elif self.get_input_format() == INPUT_FORMAT_JSON_LINES:
+
+            # Full Mode, JSON Lines
+            return list(self._iter_source(use_float=True))
+
+        elif self._statements is not None:
+
+            # Full Mode, already parsed
+            if self._compact_statements:
+                return list(self._iter_source(use_float=True))
+            return self._statements
+
         else:
 
             # Full Mode
-            with open(self._filename) as fp:
-                return json.load(fp)
+            if (
+                self._compact_statements
+                and self.get_top_level_type() == TOP_LEVEL_TYPE_ARRAY
+            ):
+                with self._gc_paused():
+                    return list(self._iter_source(use_float=True))
+            with self._open() as fp, self._gc_paused():
+                return self._compact(self._json_backend.loads(fp.read()))
+
+    @contextlib.contextmanager
+    def _gc_paused(self):
+        """Turns off the cyclic garbage collector while the input is parsed, if pause_gc was given."""
+        was_enabled = gc.isenabled()
+        if self._pause_gc:
+            gc.disable()
+        try:
+            yield
+        finally:
+            if self._pause_gc and was_enabled:
+                gc.enable()
+
+    def _load_sample_reservoir(self, statements):
+        """Takes a random sample of statements of each type, in one pass, using reservoir sampling."""
+        rng = random.Random(self._sample_mode_seed)
+        max_count = self._sample_mode_max_row_count_per_statement_type
+        samples: dict = {}
+        seen_counts: dict = {}
+        for position, statement in enumerate(statements):
+            statement_type = _get_sample_mode_statement_type(statement)
+            seen_counts[statement_type] = seen_counts.get(statement_type, 0) + 1
+            sample = samples.setdefault(statement_type, [])
+            if len(sample) < max_count:
+                sample.append((position, statement))
+            else:
+                # Keep this statement with probability max_count / seen_counts[statement_type]
+                replace = rng.randrange(seen_counts[statement_type])
+                if replace < max_count:
+                    sample[replace] = (position, statement)
+        return _in_file_order(samples)
+
+    def _load_sample_by_jumping(self):
+        """Takes a random sample of statements of each type, by reading statements at random places in the file."""
+        if self._statements is not None or self.get_compression() != COMPRESSION_NONE:
+            return self._load_sample_reservoir(self._iter_source(use_float=False))
+        json_lines = self.get_input_format() == INPUT_FORMAT_JSON_LINES
+        if not json_lines:
+            with self._open() as fp:
+                if not _is_top_level_array(fp):
+                    self._check_parses(fp)
+                    return []
+        rng = random.Random(self._sample_mode_seed)
+        max_count = self._sample_mode_max_row_count_per_statement_type
+        max_jumps = (
+            max_count
+            * (len(_SAMPLE_MODE_STATEMENT_TYPES) + 1)
+            * _SAMPLE_MODE_JUMPS_PER_STATEMENT
+        )
+        samples: dict = {}
+        seen_starts = set()
+        with self._open_buffer() as buffer:
+            offsets = (
+                self._statement_offsets if self._can_use_statement_index() else None
+            )
+            if offsets is not None:
+                # We know where every statement is, so pick statements (not places) at random
+                statement_count = len(offsets) // 2
+                jumps = (
+                    (offsets[i * 2], offsets[i * 2 + 1])
+                    for i in rng.sample(
+                        range(statement_count), min(statement_count, max_jumps)
+                    )
+                )
+            else:
+                jumps = ((rng.randrange(len(buffer)), None) for _ in range(max_jumps))
+            for start, end in jumps:
+                try:
+                    if end is not None:
+                        found = (
+                            start,
+                            end,
+                            self._json_backend.loads(
+                                buffer[start:end], use_decimal=True
+                            ),
+                        )
+                    elif json_lines:
+                        found = find_json_lines_item_at(
+                            buffer, start, parse_float=Decimal
+                        )
+                    else:
+                        found = find_json_array_item_at(
+                            buffer, start, parse_float=Decimal
+                        )
+                except ValueError:
+                    # Bad JSON Lines lines are left out of the sample
+                    continue
+                if found is None or found[0] in seen_starts:
+                    continue
+                seen_starts.add(found[0])
+                statement_type = _get_sample_mode_statement_type(found[2])
+                sample = samples.setdefault(statement_type, [])
+                if len(sample) < max_count:
+                    sample.append((found[0], self._compact(found[2])))
+                    if len(samples) == len(_SAMPLE_MODE_STATEMENT_TYPES) + 1 and all(
+                        len(s) >= max_count for s in samples.values()
+                    ):
+                        break
+        return _in_file_order(samples)
+
+    def _open(self):
+        """Opens the input in binary mode, decompressing or memory-mapping it if needed."""
+        compression = self.get_compression()
+        if self._data is not None:
+            for _, compression_format, opener in _COMPRESSION_FORMATS:
+                if compression == compression_format:
+                    return opener(io.BytesIO(self._data), "rb")
+            return io.BytesIO(self._data)
+        if self._use_mmap and compression == COMPRESSION_NONE:
+            with open(self._filename, "rb") as fp:
+                # An empty file can't be mapped
+                if os.fstat(fp.fileno()).st_size > 0:
+                    # The map keeps its own handle to the file, so it is safe to close fp
+                    return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        for _, compression_format, opener in _COMPRESSION_FORMATS:
+            if compression == compression_format:
+                return opener(self._filename, "rb")
+        return open(self._filename, "rb")
+
+    @contextlib.contextmanager
+    def _open_buffer(self):
+        """Memory-maps an uncompressed file. Yields an empty bytes object for an empty file, as that can't be mapped.
+
+        For input passed in as bytes, yields that."""
+        if self._data is not None:
+            yield self._data
+            return
+        with open(self._filename, "rb") as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                yield b""
+            else:
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    yield buffer
+
+    def _iter_spans(self, buffer):
+        if self.get_input_format() == INPUT_FORMAT_JSON_LINES:
+            return iter_json_lines_spans(buffer)
+        else:
+            return iter_json_array_spans(buffer)
+
+    def _get_size(self):
+        """Returns the size of the input in bytes, or None for already parsed input."""
+        if self._data is not None:
+            return len(self._data)
+        if self._filename is not None:
+            return os.path.getsize(self._filename)
+        return None
+
+    def _can_use_statement_index(self) -> bool:
+        if not self._use_statement_index or self._statements is not None:
+            return False
+        if self._statement_offsets is not None:
+            return True
+        if self.get_compression() != COMPRESSION_NONE:
+            return False
+        if not self._saved_statement_index_checked and self._filename is not None:
+            self._saved_statement_index_checked = True
+            self._statement_offsets = load_statement_index(
+                self._get_statement_index_filename(), self._filename
+            )
+            if self._statement_offsets is not None:
+                return True
+        if self.get_input_format() == INPUT_FORMAT_JSON_LINES:
+            return True
+        with self._open() as fp:
+            return _is_top_level_array(fp)
+
+    def _get_statement_index_filename(self) -> str:
+        return os.fspath(self._filename) + STATEMENT_INDEX_SUFFIX
+
+    def _set_statement_offsets(self, offsets):
+        self._statement_offsets = offsets
+        if self._save_statement_index and self._filename is not None:
+            save_statement_index(
+                self._get_statement_index_filename(), self._filename, offsets
+            )
+
+    def _compact(self, statement):
+        if self._compact_statements:
+            return compact_statement(statement, freeze=self._freeze_statements)
+        return statement
+
+    def _iter_source(self, use_float, whole_value_if_not_array=False, compact=True):
+        """Yields statements from the input one at a time.
+
+        use_float: if False, non-integer numbers are returned as Decimal (the ijson default).
+        whole_value_if_not_array: if the input is JSON and not an array, yield the whole value as one item.
+            Otherwise nothing is yielded in that case.
+        compact: if False, statements are not made compact even with intern_strings or freeze_statements
+            (for callers that don't keep them)."""
+        statements = self._iter_source_uncompacted(use_float, whole_value_if_not_array)
+        if not (compact and self._compact_statements):
+            yield from statements
+            return
+        for statement in statements:
+            yield self._compact(statement)
+
+    def _iter_source_uncompacted(self, use_float, whole_value_if_not_array):
+        if self._statements is not None:
+            yield from self._statements
+            return
+        if self._can_use_statement_index():
+            yield from self._iter_source_with_statement_index(use_float)
+            return
+        with self._open() as fp:
+            if self.get_input_format() == INPUT_FORMAT_JSON_LINES:
+                yield from self._iter_json_lines(fp, use_float)
+            elif not _is_top_level_array(fp):
+                if whole_value_if_not_array:
+                    fp.seek(0)
+                    yield self._json_backend.loads(fp.read())
+                else:
+                    self._check_parses(fp)
+            elif use_float:
+                fp.seek(0)
+                # The json module gives the same statements json.load would in full mode
+                # (ijson's C backend can't handle some very large integers that json.load can)
+                for _, _, statement in iter_json_array_items(fp):
+                    yield statement
+            else:
+                fp.seek(0)
+                self._ijson_backend_used = self._ijson.backend_name
+                yield from self._ijson.items(fp, "item", use_float=use_float)
+
+    def _check_parses(self, fp):
+        """For input that isn't a JSON array, so has no statements: reads it all with ijson,
+        so that if it isn't a complete JSON value either, the parse error is raised as it always was."""
+        fp.seek(0)
+        for _ in self._ijson.parse(fp):
+            pass
+
+    def _iter_source_with_statement_index(self, use_float):
+        """Like _iter_source, but uses the statement index, and builds it if there isn't one yet."""
+        parse_float = None if use_float else Decimal
+        json_lines = self.get_input_format() == INPUT_FORMAT_JSON_LINES
+        if json_lines:
+            self._parse_errors = []
+        with self._open_buffer() as buffer:
+            offsets = self._statement_offsets
+            if offsets is not None:
+                spans = (
+                    (offsets[i], offsets[i + 1]) for i in range(0, len(offsets), 2)
+                )
+            elif json_lines:
+                spans = iter_json_lines_spans(buffer)
+            else:
+                # Parse and index in one go
+                new_offsets = array("q")
+                for start, end, statement in iter_json_array_items(
+                    buffer, parse_float=parse_float
+                ):
+                    new_offsets.append(start)
+                    new_offsets.append(end)
+                    yield statement
+                # Only keep the index if we got to the end (in sample mode we might stop early)
+                self._set_statement_offsets(new_offsets)
+                return
+            new_offsets = array("q") if offsets is None else None
+            for start, end in spans:
+                if new_offsets is not None:
+                    new_offsets.append(start)
+                    new_offsets.append(end)
+                try:
+                    yield self._json_backend.loads(
+                        buffer[start:end], use_decimal=not use_float
+                    )
+                except ValueError as e:
+                    if not json_lines:
+                        raise
+                    self._parse_errors.append(
+                        {"line": line_number_at(buffer, start), "message": str(e)}
+                    )
+            if new_offsets is not None:
+                self._set_statement_offsets(new_offsets)
+
+    def _iter_json_lines(self, fp, use_float):
+        self._parse_errors = []
+        # Use readline() as memory-mapped files can't be iterated over by line
+        for line_number, line in enumerate(iter(fp.readline, b""), start=1):
+            if line_number == 1 and line.startswith(UTF8_BOM):
+                line = line[len(UTF8_BOM) :]
+            if not line.strip():
+                continue
+            try:
+                yield self._json_backend.loads(line, use_decimal=not use_float)
+            except ValueError as e:
+                # This catches json.JSONDecodeError and UnicodeDecodeError
+                self._parse_errors.append({"line": line_number, "message": str(e)})
+
+
+def _get_sample_mode_statement_type(statement):
+    statement_type = get_statement_type(statement)
+    return (
+        statement_type if statement_type in _SAMPLE_MODE_STATEMENT_TYPES else "unknown"
+    )
+
+
+def _in_file_order(samples: dict) -> list:
+    """Takes {statement type: [(position, statement), ...]} and returns the statements in order of position."""
+    return [
+        statement
+        for _, statement in sorted(
+            (item for sample in samples.values() for item in sample),
+            key=lambda item: item[0],
+        )
+    ]
+
+
+def _skip_bom_and_whitespace(fp) -> bytes:
+    """Returns the first chunk of the file that has something other than whitespace in it,
+    with leading whitespace removed. Returns an empty bytes object if there is nothing."""
+    first = True
+    while True:
+        chunk = fp.read(1024)
+        if not chunk:
+            return b""
+        if first and chunk.startswith(UTF8_BOM):
+            chunk = chunk[len(UTF8_BOM) :]
+        first = False
+        chunk = chunk.lstrip()
+        if chunk:
+            return chunk
+
+
+def _is_top_level_array(fp) -> bool:
+    return _skip_bom_and_whitespace(fp)[:1] == b"["
+
+
+def _detect_input_format(fp) -> str:
+    """JSON Lines if the first line is a JSON object on its own and there is another line with something in it.
+
+    A file with only one object on one line is treated as JSON, as it always has been.
+    If the first line starts like an object but can't be parsed, it is JSON Lines if the next line with something
+    in it is a JSON object on its own, so that a bad first line is reported like any other bad line."""
+    if _skip_bom_and_whitespace(fp)[:1] != b"{":
+        return INPUT_FORMAT_JSON
+    fp.seek(0)
+    first_line = fp.readline()
+    if first_line.startswith(UTF8_BOM):
+        first_line = first_line[len(UTF8_BOM) :]
+    try:
+        if not _is_json_object(first_line):
+            return INPUT_FORMAT_JSON
+    except ValueError:
+        # A bad first line. If the line after it is an object, this is JSON Lines with a bad line in it.
+        next_line = _read_line_with_something_in(fp)
+        try:
+            if next_line is None or not _is_json_object(next_line):
+                return INPUT_FORMAT_JSON
+        except ValueError:
+            return INPUT_FORMAT_JSON
+        return INPUT_FORMAT_JSON_LINES
+    if _read_line_with_something_in(fp) is None:
+        return INPUT_FORMAT_JSON
+    return INPUT_FORMAT_JSON_LINES
+
+
+def _read_line_with_something_in(fp):
+    """Reads lines until one has something other than whitespace in it, and returns it (or None at the end)."""
+    for line in iter(fp.readline, b""):
+        if line.strip():
+            return line
+    return None
+
+
+def _is_json_object(line) -> bool:
+    """Returns whether a line is a JSON object on its own. Raises ValueError if it isn't JSON."""
+    return isinstance(json.loads(line), dict)
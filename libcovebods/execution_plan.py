@@ -0,0 +1,126 @@
+import threading
+import weakref
+
+from libcovebods.base_task import AdditionalCheck
+from libcovebods.utils import (
+    STATEMENT_TYPE_CODE_ENTITY,
+    STATEMENT_TYPE_CODE_OWNERSHIP_OR_CONTROL,
+    STATEMENT_TYPE_CODE_PERSON,
+)
+
+# The hooks called for every statement, in each pass
+FIRST_PASS_HOOKS = (
+    "check_statement_first_pass",
+    "check_entity_statement_first_pass",
+    "check_person_statement_first_pass",
+    "check_ownership_or_control_statement_first_pass",
+)
+SECOND_PASS_HOOKS = (
+    "check_statement_second_pass",
+    "check_entity_statement_second_pass",
+    "check_person_statement_second_pass",
+    "check_ownership_or_control_statement_second_pass",
+)
+STATEMENT_HOOKS = FIRST_PASS_HOOKS + SECOND_PASS_HOOKS + ("final_checks",)
+
+# Which hook (by position in FIRST_PASS_HOOKS or SECOND_PASS_HOOKS) is called for each statement type code
+_STATEMENT_TYPE_HOOK_POSITIONS = (
+    (STATEMENT_TYPE_CODE_ENTITY, 1),
+    (STATEMENT_TYPE_CODE_PERSON, 2),
+    (STATEMENT_TYPE_CODE_OWNERSHIP_OR_CONTROL, 3),
+)
+
+# Plans already built: {config: {(schema_version, task_classes): ExecutionPlan}}
+_plans: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_plans_lock = threading.Lock()
+
+
+def overrides_hook(task_class, hook_name) -> bool:
+    """Does the task class (or a parent of it) do something in this hook, rather than using AdditionalCheck's?"""
+    return getattr(task_class, hook_name) is not getattr(AdditionalCheck, hook_name)
+
+
+class ExecutionPlan:
+    """
+    Which task classes apply to a config and schema version, and which of their hooks need calling.
+
+    Working this out once means process_additional_checks doesn't call the hooks that tasks don't override
+    (which do nothing), and can skip the second pass over the data altogether if no task has a second pass hook.
+
+    Use get_execution_plan() to get one.
+    """
+
+    def __init__(self, task_classes, lib_cove_bods_config, schema_object):
+        self.schema_version = schema_object.schema_version
+        # The task classes that apply, in the order given
+        self.task_classes = tuple(
+            task_class
+            for task_class in task_classes
+            if task_class.does_apply_to_schema(lib_cove_bods_config, schema_object)
+        )
+        # {hook name: the task classes that override it}
+        self.hook_task_classes = {
+            hook_name: tuple(
+                task_class
+                for task_class in self.task_classes
+                if overrides_hook(task_class, hook_name)
+            )
+            for hook_name in STATEMENT_HOOKS
+        }
+        self.needs_second_pass = any(
+            self.hook_task_classes[hook_name] for hook_name in SECOND_PASS_HOOKS
+        )
+        self.needs_record_index = any(
+            task_class.uses_record_index for task_class in self.task_classes
+        )
+
+    def create_task_instances(self, lib_cove_bods_config, schema_object) -> list:
+        """Returns a new instance of each task class, for one run."""
+        return [
+            task_class(lib_cove_bods_config, schema_object)
+            for task_class in self.task_classes
+        ]
+
+    def get_hooks(self, task_instances, hook_name) -> list:
+        """Returns the bound methods to call for a hook, given the instances from create_task_instances()."""
+        task_classes = self.hook_task_classes[hook_name]
+        return [
+            getattr(task_instance, hook_name)
+            for task_instance in task_instances
+            if type(task_instance) in task_classes
+        ]
+
+    def get_pass_hooks(self, task_instances, hook_names) -> tuple:
+        """For FIRST_PASS_HOOKS or SECOND_PASS_HOOKS, returns (hooks for every statement, hooks by statement type)
+        where hooks by statement type is a list that can be indexed by statement type code."""
+        all_hooks = self.get_hooks(task_instances, hook_names[0])
+        # (Nothing is called for STATEMENT_TYPE_CODE_OTHER)
+        hooks_by_statement_type: list = [[] for _ in range(4)]
+        for statement_type_code, position in _STATEMENT_TYPE_HOOK_POSITIONS:
+            hooks_by_statement_type[statement_type_code] = self.get_hooks(
+                task_instances, hook_names[position]
+            )
+        return all_hooks, hooks_by_statement_type
+
+    def get_hook_counts(self) -> dict:
+        """Returns {hook name: number of task classes that need calling}, eg for benchmarking."""
+        return {
+            hook_name: len(task_classes)
+            for hook_name, task_classes in self.hook_task_classes.items()
+        }
+
+
+def get_execution_plan(task_classes, lib_cove_bods_config, schema_object):
+    """
+    Returns the ExecutionPlan for these task classes, config and schema version.
+    It is only built once per config object, and is shared.
+    """
+    key = (schema_object.schema_version, tuple(task_classes))
+    with _plans_lock:
+        plans_for_config = _plans.setdefault(lib_cove_bods_config, {})
+        plan = plans_for_config.get(key)
+    if plan is None:
+        plan = ExecutionPlan(task_classes, lib_cove_bods_config, schema_object)
+        with _plans_lock:
+            plans_for_config[key] = plan
+    return plan
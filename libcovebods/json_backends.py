@@ -0,0 +1,88 @@
+import json
+import re
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+JSON_BACKEND_AUTO = "auto"
+JSON_BACKEND_JSON = "json"
+JSON_BACKEND_ORJSON = "orjson"
+
+# Integers that don't fit in 64 bits have at least 19 digits. Some versions of orjson turn these into floats
+# instead of giving an error, so data with a run of digits this long is parsed by the json module.
+# (Translating every digit to "0" and everything else to " " and then searching is much quicker than a regex.)
+_DIGITS_TO_ZERO_TABLE = bytes(
+    ord("0") if chr(i).isdigit() and i < 128 else ord(" ") for i in range(256)
+)
+_LONG_DIGITS = b"0" * 19
+_LONG_DIGITS_STR_RE = re.compile(r"[0-9]{19}")
+
+# How much of the data _may_have_big_integers translates at once, so it never copies the whole input
+_SCAN_CHUNK_SIZE = 1024 * 1024
+
+
+def _may_have_big_integers(data) -> bool:
+    if isinstance(data, str):
+        return _LONG_DIGITS_STR_RE.search(data) is not None
+    # Each chunk starts a little before the end of the last one, so a run of digits across the join is found
+    overlap = len(_LONG_DIGITS) - 1
+    with memoryview(data) as view:
+        for start in range(0, len(view), _SCAN_CHUNK_SIZE):
+            chunk = view[max(0, start - overlap) : start + _SCAN_CHUNK_SIZE]
+            if _LONG_DIGITS in chunk.tobytes().translate(_DIGITS_TO_ZERO_TABLE):
+                return True
+    return False
+
+
+class JSONBackend:
+    """Parses JSON with the json module in the standard library. Other backends are faster, but give the same results.
+
+    use_decimal: if True, non-integer numbers are returned as Decimal (as ijson does in sample mode).
+    Otherwise they are returned as float (as json.load does in full mode)."""
+
+    name = JSON_BACKEND_JSON
+
+    def loads(self, data, use_decimal=False):
+        return json.loads(data, parse_float=Decimal if use_decimal else None)
+
+
+class OrjsonBackend(JSONBackend):
+    """Parses JSON with orjson, if it is installed."""
+
+    name = JSON_BACKEND_ORJSON
+
+    def loads(self, data, use_decimal=False):
+        # orjson can't give us Decimals
+        if not use_decimal and not _may_have_big_integers(data):
+            try:
+                return orjson.loads(data)
+            except ValueError:
+                # orjson is stricter than the json module (eg about very large integers, NaN and a BOM).
+                # Let the json module decide if the data is really invalid, and what error to give if so.
+                pass
+        return super().loads(data, use_decimal)
+
+
+def get_available_json_backends() -> list:
+    """Returns the names of the JSON backends that can be used, fastest first."""
+    out = []
+    if orjson is not None:
+        out.append(JSON_BACKEND_ORJSON)
+    out.append(JSON_BACKEND_JSON)
+    return out
+
+
+def get_json_backend(name=JSON_BACKEND_AUTO) -> JSONBackend:
+    """Returns a JSON backend by name. JSON_BACKEND_AUTO picks the fastest one that is installed.
+
+    Raises ValueError if the backend is not known or not installed."""
+    if name == JSON_BACKEND_AUTO:
+        name = get_available_json_backends()[0]
+    if name not in get_available_json_backends():
+        raise ValueError(f"JSON backend {name} is not available")
+    if name == JSON_BACKEND_ORJSON:
+        return OrjsonBackend()
+    return JSONBackend()
@@ -1,13 +1,21 @@
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import itertools
 import json
 from decimal import Decimal
-from typing import Union
+from typing import Optional, Union
+from urllib.parse import urlparse
 
-from jsonschema import FormatChecker
+from jsonschema import FormatChecker, validators
 from jsonschema.exceptions import ValidationError
 from jsonschema.validators import Draft4Validator, Draft202012Validator
 
 import libcovebods.data_reader
 from libcovebods.schema import SchemaBODS
+from libcovebods.schema_dir import cached, get_schema_file_data, schema_registry
+from libcovebods.schema_facts import parse_version
 
 
 class NumberStr(float):
@@ -33,7 +41,94 @@ def decimal_default(o):
     raise TypeError(f"{repr(o)} is not JSON serializable")
 
 
-def oneOf_draft4(validator, oneOf, instance, schema):
+def _get_statement_type_discriminator(oneOf):
+    """
+    Returns {statementType: position of the subschema for it} if oneOf_draft4 can pick the subschema
+    for a statement from its statementType alone, without changing the result. Otherwise returns None.
+
+    This is the case when every subschema only allows certain statementTypes (in its "enum"),
+    and each statementType is allowed by one subschema only, as the first value in its enum.
+    Then a statement with a string statementType can only be valid under the subschema for it,
+    and the subschemas before that one would only have been checked to find that they fail.
+    """
+    discriminator: Optional[dict] = {}
+    allowed_by: dict = {}
+    for index, subschema in enumerate(oneOf):
+        if not isinstance(subschema, dict) or "$ref" in subschema:
+            # (In draft 4, $ref means the other keywords are ignored)
+            discriminator = None
+            break
+        properties = subschema.get("properties")
+        statement_type_schema = (
+            properties.get("statementType") if isinstance(properties, dict) else None
+        )
+        enum = (
+            statement_type_schema.get("enum")
+            if isinstance(statement_type_schema, dict)
+            else None
+        )
+        if not isinstance(enum, list) or not enum:
+            discriminator = None
+            break
+        for position, statement_type in enumerate(enum):
+            if not isinstance(statement_type, str):
+                continue
+            allowed_by.setdefault(statement_type, []).append((index, position))
+    if discriminator is not None:
+        for statement_type, allowed in allowed_by.items():
+            if len(allowed) == 1 and allowed[0][1] == 0:
+                discriminator[statement_type] = allowed[0][0]
+            else:
+                # Could match more than one subschema, so only the exhaustive check will do
+                discriminator[statement_type] = None
+    return discriminator
+
+
+def oneOf_draft4(validator, oneOf, instance, schema, discriminators=None):
+    """
+    oneOf for draft 4 BODS schemas (0.1 to 0.3).
+
+    If the statement has a statementType, only the subschema for that statementType is checked
+    (see _get_statement_type_discriminator). This gives the same errors as _oneOf_draft4_exhaustive,
+    which checks every subschema in turn and is used for everything else.
+
+    If discriminators is given, it is a dict that the discriminators are kept in once worked out:
+    {id(oneOf list): (oneOf list, discriminator)}. It should only be used for one schema
+    (see _make_draft4_validator_class), so it goes when that schema does.
+    """
+    if discriminators is None:
+        discriminator = _get_statement_type_discriminator(oneOf)
+    else:
+        entry = discriminators.get(id(oneOf))
+        if entry is None or entry[0] is not oneOf:
+            entry = (oneOf, _get_statement_type_discriminator(oneOf))
+            discriminators[id(oneOf)] = entry
+        discriminator = entry[1]
+    if (
+        discriminator is not None
+        and isinstance(instance, dict)
+        and isinstance(instance.get("statementType"), str)
+    ):
+        statement_type = instance["statementType"]
+        if statement_type not in discriminator:
+            # No subschema allows it, so they would all fail
+            yield ValidationError(
+                "Invalid code found in statementType",
+                instance=statement_type,
+                path=("statementType",),
+                validator="enum",
+            )
+            return
+        index = discriminator[statement_type]
+        if index is not None:
+            # Any errors are for this subschema. If there are none, the other subschemas
+            # don't allow this statementType, so it is valid under exactly one.
+            yield from validator.descend(instance, oneOf[index], schema_path=index)
+            return
+    yield from _oneOf_draft4_exhaustive(validator, oneOf, instance, schema)
+
+
+def _oneOf_draft4_exhaustive(validator, oneOf, instance, schema):
     """
     oneOf_draft4 validator from
     https://github.com/Julian/jsonschema/blob/d16713a4296663f3d62c50b9f9a2893cb380b7af/jsonschema/_validators.py#L337
@@ -94,36 +189,380 @@ def oneOf_draft4(validator, oneOf, instance, schema):
         yield ValidationError("%r is valid under each of %s" % (instance, reprs))
 
 
+_allOf = Draft202012Validator.VALIDATORS["allOf"]
+
+
+def _get_record_type_dispatch(allOf):
+    """
+    Returns (property name, {value: position}) if every subschema in allOf is just
+    {"if": {"properties": {property name: {"const": value}}}, "then": ...}
+    with the same property name and a different string value, as in the 0.4 Statement schema
+    (where recordType picks the schema for recordDetails). Otherwise returns None.
+    """
+    dispatch: Optional[tuple] = None
+    names = set()
+    positions: dict = {}
+    for index, subschema in enumerate(allOf):
+        if not isinstance(subschema, dict) or set(subschema) != {"if", "then"}:
+            break
+        if_schema = subschema["if"]
+        if not isinstance(if_schema, dict) or set(if_schema) != {"properties"}:
+            break
+        properties = if_schema["properties"]
+        if not isinstance(properties, dict) or len(properties) != 1:
+            break
+        ((name, property_schema),) = properties.items()
+        if (
+            not isinstance(property_schema, dict)
+            or set(property_schema) != {"const"}
+            or not isinstance(property_schema["const"], str)
+            or property_schema["const"] in positions
+        ):
+            break
+        names.add(name)
+        positions[property_schema["const"]] = index
+    else:
+        if len(names) == 1:
+            dispatch = (names.pop(), positions)
+    return dispatch
+
+
+def allOf_record_type(validator, allOf, instance, schema, dispatches=None):
+    """
+    allOf for the 0.4 schema.
+
+    If allOf picks a schema by recordType (see _get_record_type_dispatch) and the statement has one it knows,
+    only the "then" schema for that recordType is checked. The "if" schemas aren't checked,
+    as only that one would pass. The errors are the same as jsonschema's allOf gives,
+    which is used for everything else.
+
+    If dispatches is given, it is a dict that the dispatches are kept in once worked out:
+    {id(allOf list): (allOf list, dispatch)}. It should only be used for one schema
+    (see _make_validator_class), so it goes when that schema does.
+    """
+    if dispatches is None:
+        dispatch = _get_record_type_dispatch(allOf)
+    else:
+        entry = dispatches.get(id(allOf))
+        if entry is None or entry[0] is not allOf:
+            entry = (allOf, _get_record_type_dispatch(allOf))
+            dispatches[id(allOf)] = entry
+        dispatch = entry[1]
+    if dispatch is not None and isinstance(instance, dict):
+        name, positions = dispatch
+        value = instance.get(name)
+        index = positions.get(value) if isinstance(value, str) else None
+        if index is not None:
+            for error in validator.descend(
+                instance, allOf[index]["then"], schema_path="then"
+            ):
+                # What descending into allOf[index], and then its "if", would add
+                # ("if" itself is never added to schema paths)
+                error.schema_path.appendleft(index)
+                yield error
+            return
+    yield from _allOf(validator, allOf, instance, schema)
+
+
+# Keywords at the top of a schema that don't affect validation
+_ANNOTATION_KEYWORDS = frozenset(
+    (
+        "$schema",
+        "$id",
+        "id",
+        "$comment",
+        "$defs",
+        "definitions",
+        "title",
+        "description",
+        "version",
+    )
+)
+
+
+# With jobs, statements are sent to the worker processes in chunks of this many
+_VALIDATE_CHUNK_SIZE = 500
+
+# With jobs, at most this many chunks per process are sent ahead of the results being used,
+# so memory use doesn't grow with the size of the file
+_VALIDATE_CHUNKS_PER_JOB = 4
+
+
+def _build_validator(
+    schema_version, pkg_schema_url
+) -> Union[Draft4Validator, Draft202012Validator]:
+    """Makes the validator for a schema version. The schema files are only loaded once per process."""
+    validator: Union[Draft4Validator, Draft202012Validator]
+    if parse_version(schema_version) >= parse_version("0.4"):
+        # Get the registry
+        registry = schema_registry(pkg_schema_url)
+
+        # Make the validator
+        statement_schema = registry.contents("urn:statement")
+        validator_class = cached(
+            "validator_class", pkg_schema_url, _make_validator_class
+        )
+        validator = validator_class(
+            schema=statement_schema,
+            registry=registry,
+            format_checker=FormatChecker(),
+        )
+    else:
+        uri_scheme = urlparse(pkg_schema_url).scheme
+        if uri_scheme == "http" or uri_scheme == "https":
+            raise NotImplementedError(
+                "Downloading schema files over HTTP/HTTPS is not supported"
+            )
+        validator_class = cached(
+            "draft4_validator_class", pkg_schema_url, _make_draft4_validator_class
+        )
+        validator = validator_class(
+            schema=get_schema_file_data(pkg_schema_url), format_checker=FormatChecker()
+        )
+    return validator
+
+
+def _make_validator_class(schema_dir):
+    """Makes the validator class for a 0.4 schema directory. It is kept in the schema cache with the schema,
+    so the dispatches allOf_record_type works out for that schema are forgotten when it is."""
+    return validators.extend(
+        Draft202012Validator,
+        {"allOf": functools.partial(allOf_record_type, dispatches={})},
+    )
+
+
+def _make_draft4_validator_class(schema_file):
+    """Makes the validator class for a 0.1 to 0.3 schema file. It is kept in the schema cache with the schema,
+    so the discriminators oneOf_draft4 works out for that schema are forgotten when it is."""
+    return validators.extend(
+        Draft4Validator,
+        {"oneOf": functools.partial(oneOf_draft4, discriminators={})},
+    )
+
+
+def _get_statement_schema(validator):
+    """
+    If the only check the schema makes on a list of statements is that it is a list,
+    returns the schema each statement is checked against ("items"), or True if there is none.
+    Otherwise returns None, and the data must be validated all at once.
+    """
+    package_schema = validator.schema
+    if (
+        isinstance(package_schema, dict)
+        and package_schema.get("type") == "array"
+        and set(package_schema) <= _ANNOTATION_KEYWORDS | {"type", "items"}
+    ):
+        return package_schema.get("items", True)
+    return None
+
+
+def _iter_statement_errors(validator, statement_schema, statement, index):
+    """Yields the errors for one statement, with the same paths as validating the whole list would give."""
+    for e in validator.descend(
+        statement, statement_schema, path=index, schema_path="items"
+    ):
+        yield BODSValidationError(e, statement)
+
+
+# In each worker process, (validator, statement schema), made once when the process starts
+_worker_validator = None
+
+
+def _init_worker(schema_version, pkg_schema_url):
+    global _worker_validator
+    validator = _build_validator(schema_version, pkg_schema_url)
+    _worker_validator = (validator, _get_statement_schema(validator))
+
+
+def _validate_chunk(start_index, statements) -> list:
+    """Runs in a worker process. Returns the errors for a chunk of statements that starts at start_index."""
+    assert _worker_validator is not None
+    validator, statement_schema = _worker_validator
+    return [
+        error
+        for index, statement in enumerate(statements, start_index)
+        for error in _iter_statement_errors(
+            validator, statement_schema, statement, index
+        )
+    ]
+
+
 class JSONSchemaValidator:
-    """Validates data using the JSON Schema method"""
+    """Validates data using the JSON Schema method
+
+    With jobs set to more than 1, a list of statements is validated in chunks in that many processes.
+    The results are in the same order, and the same, as validating in one process,
+    except that the errors don't keep jsonschema's context (their json() does not include it anyway).
 
-    def __init__(self, schema: SchemaBODS):
+    With max_errors set, validation stops once that many errors have been found.
+    With max_errors_per_group set, only that many errors are kept for each
+    (validator, path_ending) pair (eg every "required" error for "recordDetails" is one group).
+    If any errors were left out because of these, truncated is True afterwards.
+    These keep memory use down for data that is very broken; summarise() is another way."""
+
+    def __init__(
+        self,
+        schema: SchemaBODS,
+        jobs: Optional[int] = None,
+        max_errors: Optional[int] = None,
+        max_errors_per_group: Optional[int] = None,
+    ):
         self._schema = schema
+        self._jobs = jobs
+        self._max_errors = max_errors
+        self._max_errors_per_group = max_errors_per_group
+        self.truncated = False
+
+    def _get_validator(self) -> Union[Draft4Validator, Draft202012Validator]:
+        return _build_validator(
+            self._schema.schema_version, self._schema.pkg_schema_url
+        )
 
     def validate(self, data_reader: libcovebods.data_reader.DataReader) -> list:
         """Call with data. Results are returned."""
-        validator: Union[Draft4Validator, Draft202012Validator]
-        if self._schema.is_schema_version_equal_to_or_greater_than("0.4"):
-            # Get the registry
-            registry = self._schema._pkg_schema_obj
-
-            # Make the validator
-            statement_schema = registry.contents("urn:statement")
-            validator = Draft202012Validator(
-                schema=statement_schema,
-                registry=registry,
-                format_checker=FormatChecker(),
-            )
+        return list(self.iter_errors(data_reader))
+
+    def iter_errors(self, data_reader: libcovebods.data_reader.DataReader):
+        """Yields the same results as validate() returns, as they are found.
+
+        A list of statements is validated one statement at a time, as they are read,
+        so in streaming mode the whole file is never held in memory."""
+        self.truncated = False
+        error_count = 0
+        group_counts: dict = {}
+        # (Closing it stops any worker processes straight away if we stop early)
+        with contextlib.closing(self._iter_all_errors(data_reader)) as errors:
+            for error in errors:
+                if self._max_errors is not None and error_count >= self._max_errors:
+                    self.truncated = True
+                    return
+                if self._max_errors_per_group is not None:
+                    group = error.get_group()
+                    group_count = group_counts.get(group, 0)
+                    if group_count >= self._max_errors_per_group:
+                        self.truncated = True
+                        continue
+                    group_counts[group] = group_count + 1
+                error_count += 1
+                yield error
+
+    def summarise(
+        self,
+        data_reader: libcovebods.data_reader.DataReader,
+        examples_per_group: int = 3,
+    ) -> dict:
+        """Validates the data, and returns how many errors there are for each (validator, path_ending) pair,
+        with the json() of the first few of each, instead of all the errors.
+
+        Returns {"groups": [{"validator", "path_ending", "count", "examples"}, ...] (in the order first found),
+        "count": total number of errors, "truncated": True if max_errors stopped validation early}.
+        max_errors_per_group is not used; examples_per_group does the same job."""
+        groups: dict = {}
+        count = 0
+        self.truncated = False
+        with contextlib.closing(self._iter_all_errors(data_reader)) as errors:
+            for error in errors:
+                if self._max_errors is not None and count >= self._max_errors:
+                    self.truncated = True
+                    break
+                count += 1
+                group = error.get_group()
+                summary = groups.get(group)
+                if summary is None:
+                    summary = groups[group] = {
+                        "validator": group[0],
+                        "path_ending": group[1],
+                        "count": 0,
+                        "examples": [],
+                    }
+                summary["count"] += 1
+                if len(summary["examples"]) < examples_per_group:
+                    summary["examples"].append(error.json())
+        return {
+            "groups": list(groups.values()),
+            "count": count,
+            "truncated": self.truncated,
+        }
+
+    def _iter_all_errors(self, data_reader: libcovebods.data_reader.DataReader):
+        validator = self._get_validator()
+        statement_schema = _get_statement_schema(validator)
+        if (
+            data_reader.get_top_level_type()
+            == libcovebods.data_reader.TOP_LEVEL_TYPE_ARRAY
+            and statement_schema is not None
+        ):
+            # The only check on the list itself is that it is a list, and it is,
+            # so just check each statement against the "items" schema.
+            # This gives exactly the same errors as validating the whole list at once.
+            statements = enumerate(data_reader.get_iterator())
+            if self._jobs and self._jobs > 1:
+                yield from self._iter_errors_in_parallel(
+                    validator, statement_schema, statements
+                )
+            else:
+                for index, statement in statements:
+                    yield from _iter_statement_errors(
+                        validator, statement_schema, statement, index
+                    )
         else:
-            validator = Draft4Validator(
-                schema=self._schema._pkg_schema_obj, format_checker=FormatChecker()
+            all_data = data_reader.get_all_data()
+            for e in validator.iter_errors(all_data):
+                yield BODSValidationError(e, all_data, self._schema)
+
+    def _iter_errors_in_parallel(self, validator, statement_schema, statements):
+        """Sends chunks of statements to worker processes, and yields their errors in order."""
+        assert self._jobs is not None
+        chunks = _iter_chunks(statements)
+        # The chunks sent that we haven't used the results of yet, in order, as (start index, statements)
+        pending: collections.deque = collections.deque()
+        futures: collections.deque = collections.deque()
+        try:
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._jobs,
+                initializer=_init_worker,
+                initargs=(self._schema.schema_version, self._schema.pkg_schema_url),
+            )
+        except OSError:
+            executor = None
+        if executor is not None:
+            try:
+                for start_index, chunk in chunks:
+                    pending.append((start_index, chunk))
+                    futures.append(executor.submit(_validate_chunk, start_index, chunk))
+                    if len(futures) >= self._jobs * _VALIDATE_CHUNKS_PER_JOB:
+                        yield from futures[0].result()
+                        pending.popleft()
+                        futures.popleft()
+                while futures:
+                    yield from futures[0].result()
+                    pending.popleft()
+                    futures.popleft()
+            except (OSError, concurrent.futures.process.BrokenProcessPool):
+                # We could not start processes, or one died.
+                # Carry on in this process from the first chunk we don't have the results of.
+                pass
+            finally:
+                # (If the caller stopped early, don't wait for chunks that haven't started.)
+                executor.shutdown(wait=True, cancel_futures=True)
+        for start_index, chunk in pending:
+            for index, statement in enumerate(chunk, start_index):
+                yield from _iter_statement_errors(
+                    validator, statement_schema, statement, index
+                )
+        for index, statement in statements:
+            yield from _iter_statement_errors(
+                validator, statement_schema, statement, index
             )
-            validator.VALIDATORS["oneOf"] = oneOf_draft4
-        output = []
-        all_data = data_reader.get_all_data()
-        for e in validator.iter_errors(all_data):
-            output.append(BODSValidationError(e, all_data, self._schema))
-        return output
+
+
+def _iter_chunks(statements):
+    """Groups (index, statement) into (start index, [statement, ...]) of up to _VALIDATE_CHUNK_SIZE statements."""
+    while True:
+        chunk = list(itertools.islice(statements, _VALIDATE_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk[0][0], [statement for _, statement in chunk]
 
 
 class BODSValidationError:
@@ -133,7 +572,7 @@ class BODSValidationError:
         self,
         json_schema_exceptions_validation_error: ValidationError,
         json_data: dict,
-        schema: SchemaBODS,
+        schema: Optional[SchemaBODS] = None,
     ):
         self._message = json_schema_exceptions_validation_error.message
         self._path = json_schema_exceptions_validation_error.path
@@ -152,9 +591,15 @@ class BODSValidationError:
             else:
                 self._extra["required_key_which_is_missing"] = self._message
 
-    def json(self):
-        """Return representation of this error in JSON."""
+    def __getstate__(self):
+        # jsonschema's errors can't always be pickled (eg to send them from a worker process),
+        # and json() doesn't use them, so the context is left out.
+        state = self.__dict__.copy()
+        state["_context"] = None
+        return state
 
+    def get_path_ending(self):
+        """Returns the end of the path, with any array index replaced by [number] (see json())."""
         if self._path:
             path_ending = self._path[-1]
             if isinstance(self._path[-1], int) and len(self._path) >= 2:
@@ -164,11 +609,19 @@ class BODSValidationError:
                 path_ending = "[number]"
         else:
             path_ending = "$"
+        return path_ending
+
+    def get_group(self) -> tuple:
+        """Returns (validator, path_ending), which JSONSchemaValidator groups errors by."""
+        return (self._validator, self.get_path_ending())
+
+    def json(self):
+        """Return representation of this error in JSON."""
 
         return {
             "message": self._message,
             "path": list(self._path),
-            "path_ending": path_ending,
+            "path_ending": self.get_path_ending(),
             "schema_path": list(self._schema_path),
             "validator": self._validator,
             "validator_value": self._validator_value,
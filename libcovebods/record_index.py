@@ -0,0 +1,228 @@
+import json
+from array import array
+from itertools import repeat
+
+# Numbers that RecordIndex.values always gives these values
+VALUE_NONE = 0
+RECORD_TYPE_ENTITY = 1
+RECORD_TYPE_PERSON = 2
+RECORD_TYPE_RELATIONSHIP = 3
+
+# Bits in RecordIndex.record_types_seen
+RECORD_TYPE_SEEN_ENTITY = 1
+RECORD_TYPE_SEEN_PERSON = 2
+RECORD_TYPE_SEEN_RELATIONSHIP = 4
+RECORD_TYPE_SEEN_OTHER = 8
+
+_RECORD_TYPE_SEEN_BITS = {
+    RECORD_TYPE_ENTITY: RECORD_TYPE_SEEN_ENTITY,
+    RECORD_TYPE_PERSON: RECORD_TYPE_SEEN_PERSON,
+    RECORD_TYPE_RELATIONSHIP: RECORD_TYPE_SEEN_RELATIONSHIP,
+}
+
+
+class ValueTable:
+    """Gives each distinct JSON value a number, so that many records can share one copy of a value
+    (eg a record type, or an entityType object) and only store its number."""
+
+    def __init__(self):
+        self._values = [None, "entity", "person", "relationship"]
+        self._numbers = {_value_key(value): i for i, value in enumerate(self._values)}
+
+    def add(self, value) -> int:
+        """Returns the number for a value, giving it one if it is new."""
+        key = _value_key(value)
+        number = self._numbers.get(key)
+        if number is None:
+            number = len(self._values)
+            self._values.append(value)
+            self._numbers[key] = number
+        return number
+
+    def get(self, number):
+        """Returns the value for a number. For objects and arrays, this is the first one seen that was equal."""
+        return self._values[number]
+
+    def __len__(self):
+        return len(self._values)
+
+
+def _value_key(value):
+    # The type is included so that 1, 1.0 and True are kept apart
+    if isinstance(value, (dict, list)):
+        return (type(value), json.dumps(value, sort_keys=True, default=str))
+    return (type(value), value)
+
+
+class RecordColumn:
+    """
+    One number per record number, kept in an array.array so that it takes a few bytes per record
+    rather than a Python object. Tasks can use these for their own state about each record.
+
+    It grows as needed. Records that have not been set have the default value.
+    """
+
+    def __init__(self, typecode, default=0):
+        self.default = default
+        self.array = array(typecode)
+
+    def __getitem__(self, record_number):
+        if record_number < len(self.array):
+            return self.array[record_number]
+        return self.default
+
+    def __setitem__(self, record_number, value):
+        if record_number >= len(self.array):
+            self.array.extend(repeat(self.default, record_number + 1 - len(self.array)))
+        self.array[record_number] = value
+
+    def __len__(self):
+        return len(self.array)
+
+
+class RecordIndex:
+    """
+    What record based checks need to know about every record (0.4 and above), built once in the first pass
+    over the data and shared by all the tasks that set uses_record_index.
+
+    Each recordId is given a record number (starting at 0, in order of first appearance)
+    and everything else is kept in array.array columns indexed by record number,
+    so each recordId string is only kept once and everything else takes a few bytes per record.
+
+    Positions count statements with a recordId, starting at 0.
+    A record number can belong to an id that is only mentioned (eg in componentRecords) and has no statements;
+    these have a first_position of -1. Use has_record() to check for a real record.
+    """
+
+    def __init__(self):
+        self.record_numbers: dict = {}
+        # The recordId for each record number
+        self.record_ids: list = []
+        self.values = ValueTable()
+        # Position of the first and last statement for each record
+        self.first_position = array("q")
+        self.last_position = array("q")
+        # recordType of the last statement for each record, as a number from values
+        # (RECORD_TYPE_ENTITY etc. or VALUE_NONE if there was none)
+        self.record_type = array("i")
+        # recordDetails.entityType (for entities) or recordDetails.personType (for people) of the last statement
+        # for each record, as a number from values
+        self.subtype = array("i")
+        # RECORD_TYPE_SEEN_* bits, for the recordTypes of all statements for each record
+        self.record_types_seen = array("B")
+        # Number of statements for each record that have a recordType that isn't entity or person
+        self.not_entity_or_person_count = array("I")
+        # The record number of the last record that lists each record in recordDetails.componentRecords, or -1
+        self.component_parent = array("i")
+        # {record number: [recordType, ...]} for records with recordTypes that aren't entity, person or relationship,
+        # with every recordType that isn't entity or person, in order.
+        # These are not allowed by the schema, so this is usually empty.
+        self._unknown_record_types: dict = {}
+        self._position = 0
+
+    def __len__(self):
+        return len(self.record_numbers)
+
+    def _get_or_add_record_number(self, record_id):
+        record_number = self.record_numbers.get(record_id)
+        if record_number is None:
+            record_number = len(self.record_numbers)
+            self.record_numbers[record_id] = record_number
+            self.record_ids.append(record_id)
+            self.first_position.append(-1)
+            self.last_position.append(-1)
+            self.record_type.append(VALUE_NONE)
+            self.subtype.append(VALUE_NONE)
+            self.record_types_seen.append(0)
+            self.not_entity_or_person_count.append(0)
+            self.component_parent.append(-1)
+        return record_number
+
+    def add_statement(self, statement):
+        """Adds a statement to the index. Call for every statement, in order, in the first pass.
+
+        process_additional_checks does this before calling any task's first pass hooks, so tasks can look up
+        the record number of the statement they are given."""
+        if not isinstance(statement, dict) or "recordId" not in statement:
+            return
+        try:
+            record_number = self._get_or_add_record_number(statement["recordId"])
+        except TypeError:
+            # recordId is not a string (or anything else that can be looked up)
+            self._position += 1
+            return
+
+        position = self._position
+        self._position += 1
+        if self.first_position[record_number] == -1:
+            self.first_position[record_number] = position
+        self.last_position[record_number] = position
+
+        record_details = statement.get("recordDetails")
+        record_type = self.values.add(statement.get("recordType"))
+        self.record_type[record_number] = record_type
+        if record_type == RECORD_TYPE_ENTITY and isinstance(record_details, dict):
+            self.subtype[record_number] = self.values.add(
+                record_details.get("entityType")
+            )
+        elif record_type == RECORD_TYPE_PERSON and isinstance(record_details, dict):
+            self.subtype[record_number] = self.values.add(
+                record_details.get("personType")
+            )
+        else:
+            self.subtype[record_number] = VALUE_NONE
+
+        if "recordType" in statement:
+            self.record_types_seen[record_number] |= _RECORD_TYPE_SEEN_BITS.get(
+                record_type, RECORD_TYPE_SEEN_OTHER
+            )
+            if record_type not in (RECORD_TYPE_ENTITY, RECORD_TYPE_PERSON):
+                if (
+                    record_type != RECORD_TYPE_RELATIONSHIP
+                    and record_number not in self._unknown_record_types
+                ):
+                    # Until now they have all been relationship
+                    self._unknown_record_types[record_number] = [
+                        "relationship"
+                    ] * self.not_entity_or_person_count[record_number]
+                if record_number in self._unknown_record_types:
+                    self._unknown_record_types[record_number].append(
+                        statement["recordType"]
+                    )
+                self.not_entity_or_person_count[record_number] += 1
+
+        if isinstance(record_details, dict) and isinstance(
+            record_details.get("componentRecords"), list
+        ):
+            for component_id in record_details["componentRecords"]:
+                try:
+                    component_number = self._get_or_add_record_number(component_id)
+                except TypeError:
+                    continue
+                self.component_parent[component_number] = record_number
+
+    def get_record_number(self, record_id):
+        """Returns the record number for a recordId, or None if it has not been seen at all."""
+        try:
+            return self.record_numbers.get(record_id)
+        except TypeError:
+            return None
+
+    def has_record(self, record_id) -> bool:
+        """Is there at least one statement with this recordId?"""
+        record_number = self.get_record_number(record_id)
+        return record_number is not None and self.first_position[record_number] != -1
+
+    def get_record_type(self, record_number):
+        """Returns the recordType of the last statement for a record (None if it had none)."""
+        return self.values.get(self.record_type[record_number])
+
+    def get_subtype(self, record_number):
+        """Returns the entityType or personType of the last statement for a record (None if it had none)."""
+        return self.values.get(self.subtype[record_number])
+
+    def get_record_types_not_entity_or_person(self, record_number) -> list:
+        """Returns the recordType of every statement for a record that has a recordType that isn't entity or person."""
+        if record_number in self._unknown_record_types:
+            return list(self._unknown_record_types[record_number])
+        return ["relationship"] * self.not_entity_or_person_count[record_number]
@@ -1,12 +1,18 @@
 import libcovebods.data_reader
 import libcovebods.tasks.peps
+from libcovebods.execution_plan import (
+    FIRST_PASS_HOOKS,
+    SECOND_PASS_HOOKS,
+    get_execution_plan,
+)
+from libcovebods.record_index import RecordIndex
 from libcovebods.tasks.checks import (
     legacy_checks,
     pre_record_checks,
     record_based_checks,
 )
 from libcovebods.tasks.statistics import pre_record_statistics, record_based_statistics
-from libcovebods.utils import get_statement_type
+from libcovebods.utils import get_statement_type_classifier
 
 TASK_CLASSES = [
     legacy_checks.LegacyChecks,
@@ -101,57 +107,61 @@ def process_additional_checks(
     lib_cove_bods_config,
     schema_object,
     task_classes=TASK_CLASSES,
+    full_file_counts=False,
 ):
-    additional_check_instances = [
-        x(lib_cove_bods_config, schema_object)
-        for x in task_classes
-        if x.does_apply_to_schema(lib_cove_bods_config, schema_object)
-    ]
-    all_data = data_reader.get_all_data()
+    """Runs the task classes over the data and returns their results.
+
+    If full_file_counts is set, the output also has counts for the whole file under "full_file_counts"
+    (see DataReader.get_full_file_counts()). This is useful in sample mode,
+    where "statistics" only describe the sample."""
+    plan = get_execution_plan(task_classes, lib_cove_bods_config, schema_object)
+    additional_check_instances = plan.create_task_instances(
+        lib_cove_bods_config, schema_object
+    )
 
-    # If not list of statements put in list so that additional checks
-    # can be run (jsonschema validation will handle reporting error)
-    if not isinstance(all_data, list):
-        all_data = [all_data]
+    # Each statement is classified once, in the first pass, and the result is kept for the second pass
+    # (one byte per statement, so this is small even when the statements themselves are not kept in memory)
+    classify_statement = get_statement_type_classifier(schema_object)
+    statement_type_codes = bytearray()
 
     # First pass
-    for statement in all_data:
-        statement_type = get_statement_type(statement, schema_object)
+    # (If not list of statements, get_iterator() yields it as a single statement so that additional checks
+    # can be run - jsonschema validation will handle reporting error)
+    # Only hooks that tasks override are called; hooks_by_statement_type is indexed by statement type code.
+    hooks, hooks_by_statement_type = plan.get_pass_hooks(
+        additional_check_instances, FIRST_PASS_HOOKS
+    )
+    # If any tasks need it, the record index is built once in the first pass and shared by them all
+    if plan.needs_record_index:
+        record_index = RecordIndex()
         for additional_check_instance in additional_check_instances:
-            additional_check_instance.check_statement_first_pass(statement)
-        if statement_type == "entityStatement":
-            for additional_check_instance in additional_check_instances:
-                additional_check_instance.check_entity_statement_first_pass(statement)
-        elif statement_type == "personStatement":
-            for additional_check_instance in additional_check_instances:
-                additional_check_instance.check_person_statement_first_pass(statement)
-        elif statement_type == "ownershipOrControlStatement":
-            for additional_check_instance in additional_check_instances:
-                additional_check_instance.check_ownership_or_control_statement_first_pass(
-                    statement
-                )
+            if additional_check_instance.uses_record_index:
+                additional_check_instance.set_record_index(record_index)
+        hooks.insert(0, record_index.add_statement)
+    for statement in data_reader.get_iterator():
+        statement_type_code = classify_statement(statement)
+        statement_type_codes.append(statement_type_code)
+        for hook in hooks:
+            hook(statement)
+        for hook in hooks_by_statement_type[statement_type_code]:
+            hook(statement)
 
     # Second Pass
-    for statement in all_data:
-        # statement_type = statement.get("statementType")
-        statement_type = get_statement_type(statement, schema_object)
-        for additional_check_instance in additional_check_instances:
-            additional_check_instance.check_statement_second_pass(statement)
-        if statement_type == "entityStatement":
-            for additional_check_instance in additional_check_instances:
-                additional_check_instance.check_entity_statement_second_pass(statement)
-        elif statement_type == "personStatement":
-            for additional_check_instance in additional_check_instances:
-                additional_check_instance.check_person_statement_second_pass(statement)
-        elif statement_type == "ownershipOrControlStatement":
-            for additional_check_instance in additional_check_instances:
-                additional_check_instance.check_ownership_or_control_statement_second_pass(
-                    statement
-                )
+    # In streaming mode this reads the file again, rather than holding all the data in memory,
+    # so it is skipped if no task needs it.
+    if plan.needs_second_pass:
+        hooks, hooks_by_statement_type = plan.get_pass_hooks(
+            additional_check_instances, SECOND_PASS_HOOKS
+        )
+        for statement_number, statement in enumerate(data_reader.get_iterator()):
+            for hook in hooks:
+                hook(statement)
+            for hook in hooks_by_statement_type[statement_type_codes[statement_number]]:
+                hook(statement)
 
     # Final checks
-    for additional_check_instance in additional_check_instances:
-        additional_check_instance.final_checks()
+    for hook in plan.get_hooks(additional_check_instances, "final_checks"):
+        hook()
 
     # Get results
     additional_checks = []
@@ -163,4 +173,11 @@ def process_additional_checks(
             additional_check_instance.get_additional_check_results()
         )
         statistics.update(additional_check_instance.get_statistics())
-    return {"additional_checks": additional_checks, "statistics": statistics}
+    output = {
+        "additional_checks": additional_checks,
+        "statistics": statistics,
+        "metadata": data_reader.get_metadata(),
+    }
+    if full_file_counts:
+        output["full_file_counts"] = data_reader.get_full_file_counts()
+    return output
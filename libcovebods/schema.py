@@ -1,13 +1,14 @@
-import json
 from typing import Optional
 from urllib.parse import urlparse
 
-from libcove2.common import schema_dict_fields_generator  # type: ignore
-from packaging import version as packaging_version
-
 import libcovebods.data_reader
 from libcovebods.config import LibCoveBODSConfig
-from libcovebods.schema_dir import get_scheme_file_data, schema_registry
+from libcovebods.schema_dir import (
+    check_schema_files,
+    get_schema_file_data,
+    schema_registry,
+)
+from libcovebods.schema_facts import SchemaFacts, get_schema_facts, parse_version
 
 try:
     from functools import cached_property
@@ -45,6 +46,13 @@ class SchemaBODS:
         self.schema_error: Optional[dict] = None
         # Now try to work out version from information passed
         self.__work_out_schema_version(data_reader)
+        # Schema files are cached for the whole process; make sure they haven't changed since
+        # (This is the only time they are checked, so it isn't done for every look up)
+        if self.pkg_schema_url and urlparse(self.pkg_schema_url).scheme not in (
+            "http",
+            "https",
+        ):
+            check_schema_files(self.pkg_schema_url)
 
     def __work_out_schema_version(
         self, data_reader: Optional[libcovebods.data_reader.DataReader] = None
@@ -60,18 +68,22 @@ class SchemaBODS:
 
         # If bad data passed, then we assume it's the default version,
         # or latest version if is record based data
-        all_data = data_reader.get_all_data()
-        if not isinstance(all_data, list) or len(all_data) == 0:
-            if not isinstance(all_data, list):
-                if record_based_statement(all_data):
-                    self.schema_version = self.config.config["schema_latest_version"]
-                    self.pkg_schema_url = self.config.config["schema_versions"][
-                        self.schema_version
-                    ]["schema_url"]
-                    self.schema_host = self.config.config["schema_versions"][
-                        self.schema_version
-                    ]["schema_url_host"]
-                    return
+        # (Only the start of the data is read to work this out, so this is quick even for big files)
+        if (
+            data_reader.get_top_level_type()
+            != libcovebods.data_reader.TOP_LEVEL_TYPE_ARRAY
+        ):
+            # Not a list of statements, so all_data is a single value anyway
+            all_data = data_reader.get_all_data()
+            if record_based_statement(all_data):
+                self.schema_version = self.config.config["schema_latest_version"]
+                self.pkg_schema_url = self.config.config["schema_versions"][
+                    self.schema_version
+                ]["schema_url"]
+                self.schema_host = self.config.config["schema_versions"][
+                    self.schema_version
+                ]["schema_url_host"]
+                return
             self.pkg_schema_url = self.config.config["schema_url"]
             self.schema_host = self.config.config["schema_url_host"]
             self.schema_version_attempted = self.config.config["schema_version"]
@@ -79,7 +91,15 @@ class SchemaBODS:
             return
 
         # We look at the first statement to try to find a version
-        statement = all_data[0]
+        statement = data_reader.peek_first_statement()
+
+        # If there are no statements, then we assume it's the default version
+        if statement is None:
+            self.pkg_schema_url = self.config.config["schema_url"]
+            self.schema_host = self.config.config["schema_url_host"]
+            self.schema_version_attempted = self.config.config["schema_version"]
+            self.schema_version = self.config.config["schema_version"]
+            return
 
         # If version is not set at all, then we assume it's the default version
         if (
@@ -172,93 +192,25 @@ class SchemaBODS:
             "schema_url_host"
         ]
 
+    @cached_property
+    def facts(self) -> SchemaFacts:
+        """Facts about this schema version that tasks need. Shared, so read only."""
+        return get_schema_facts(self.schema_version, self.pkg_schema_url)
+
     def get_entity_statement_types_list(self):
-        if self.is_schema_version_equal_to_or_less_than("0.3"):
-            for statement_schema in self._pkg_schema_obj["items"]["oneOf"]:
-                if (
-                    statement_schema["properties"]["statementType"]["enum"][0]
-                    == "entityStatement"
-                ):
-                    return statement_schema["properties"]["entityType"]["enum"]
-        else:
-            entity_schema = get_scheme_file_data(self.pkg_schema_url, "entity")
-            return entity_schema["properties"]["entityType"]["properties"]["type"][
-                "enum"
-            ]
+        return list(self.facts.entity_types)
 
     def get_person_statement_types_list(self):
-        if self.is_schema_version_equal_to_or_less_than("0.3"):
-            for statement_schema in self._pkg_schema_obj["items"]["oneOf"]:
-                if (
-                    statement_schema["properties"]["statementType"]["enum"][0]
-                    == "personStatement"
-                ):
-                    return statement_schema["properties"]["personType"]["enum"]
-        else:
-            person_schema = get_scheme_file_data(self.pkg_schema_url, "person")
-            return person_schema["properties"]["personType"]["enum"]
+        return list(self.facts.person_types)
 
     def get_ownership_or_control_statement_interest_statement_types_list(self):
-        if self.is_schema_version_equal_to_or_less_than("0.3"):
-            for statement_schema in self._pkg_schema_obj["items"]["oneOf"]:
-                if (
-                    statement_schema["properties"]["statementType"]["enum"][0]
-                    == "ownershipOrControlStatement"
-                ):
-                    return statement_schema["properties"]["interests"]["items"][
-                        "properties"
-                    ]["type"]["enum"]
-        else:
-            relationship_schema = get_scheme_file_data(
-                self.pkg_schema_url, "relationship"
-            )
-            return relationship_schema["$defs"]["Interest"]["properties"]["type"][
-                "enum"
-            ]
+        return list(self.facts.interest_types)
 
     def get_ownership_or_control_statement_interest_direct_or_indirect_list(self):
-        if self.is_schema_version_equal_to_or_less_than("0.3"):
-            for statement_schema in self._pkg_schema_obj["items"]["oneOf"]:
-                if (
-                    statement_schema["properties"]["statementType"]["enum"][0]
-                    == "ownershipOrControlStatement"
-                ):
-                    direct_or_indirect_json_schema = statement_schema["properties"][
-                        "interests"
-                    ]["items"]["properties"].get("directOrIndirect")
-                    # This is only available in 0.3 and above.
-                    if isinstance(direct_or_indirect_json_schema, dict):
-                        return direct_or_indirect_json_schema.get("enum")
-                    else:
-                        return []
-        else:
-            relationship_schema = get_scheme_file_data(
-                self.pkg_schema_url, "relationship"
-            )
-            return relationship_schema["$defs"]["Interest"]["properties"][
-                "directOrIndirect"
-            ]["enum"]
+        return list(self.facts.interest_direct_or_indirect)
 
     def get_person_statement_political_exposure_status_list(self):
-        if self.is_schema_version_equal_to_or_less_than("0.3"):
-            for statement_schema in self._pkg_schema_obj["items"]["oneOf"]:
-                if (
-                    statement_schema["properties"]["statementType"]["enum"][0]
-                    == "personStatement"
-                ):
-                    political_exposure_schema = statement_schema["properties"].get(
-                        "politicalExposure"
-                    )
-                    # This is only available in 0.3 and above.
-                    if isinstance(political_exposure_schema, dict):
-                        return political_exposure_schema["properties"]["status"]["enum"]
-                    else:
-                        return []
-        else:
-            person_schema = get_scheme_file_data(self.pkg_schema_url, "person")
-            return person_schema["properties"]["politicalExposure"]["properties"][
-                "status"
-            ]["enum"]
+        return list(self.facts.political_exposure_statuses)
 
     def get_inconsistent_schema_version_used_for_statement(self, statement):
         # If version is not set at all, then we assume it's the default version
@@ -280,36 +232,22 @@ class SchemaBODS:
             return False, None
 
     def get_address_types_allowed_in_entity_statement(self):
-        return ("registered", "business", "alternative")
+        return self.facts.address_types_allowed_in_entity_statement
 
     def get_address_types_allowed_in_person_statement(self):
-        return ("placeOfBirth", "residence", "service", "alternative")
+        return self.facts.address_types_allowed_in_person_statement
 
     def is_schema_version_equal_to_or_greater_than(self, version):
-        return packaging_version.parse(self.schema_version) >= packaging_version.parse(
-            version
-        )
+        return parse_version(self.schema_version) >= parse_version(version)
 
     def is_schema_version_equal_to_or_less_than(self, version):
-        return packaging_version.parse(self.schema_version) <= packaging_version.parse(
-            version
-        )
+        return parse_version(self.schema_version) <= parse_version(version)
 
     def is_schema_version_less_than(self, version):
-        return packaging_version.parse(self.schema_version) <= packaging_version.parse(
-            version
-        )
+        return parse_version(self.schema_version) <= parse_version(version)
 
     def get_package_schema_fields(self) -> set:
-        if self.is_schema_version_equal_to_or_greater_than("0.4"):
-            return set(
-                schema_dict_fields_generator(
-                    self._pkg_schema_obj.contents("urn:statement"),
-                    registry=self._pkg_schema_obj,
-                )
-            )
-        else:
-            return set(schema_dict_fields_generator(self._pkg_schema_obj))
+        return set(self.facts.package_schema_fields)
 
     @cached_property
     def pkg_schema_str(self):
@@ -325,9 +263,16 @@ class SchemaBODS:
                 with open(self.pkg_schema_url) as fp:
                     return fp.read()
 
-    @property
+    @cached_property
     def _pkg_schema_obj(self):
+        # Both of these are cached for the whole process, so are only loaded once
+        # however many SchemaBODS objects there are
         if self.is_schema_version_equal_to_or_greater_than("0.4"):
             return schema_registry(self.pkg_schema_url)
         else:
-            return json.loads(self.pkg_schema_str)
+            uri_scheme = urlparse(self.pkg_schema_url).scheme
+            if uri_scheme == "http" or uri_scheme == "https":
+                raise NotImplementedError(
+                    "Downloading schema files over HTTP/HTTPS is not supported"
+                )
+            return get_schema_file_data(self.pkg_schema_url)
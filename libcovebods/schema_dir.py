@@ -1,11 +1,82 @@
 import json
+import os
+import threading
 from pathlib import Path
 
 from jscc.schema import is_json_schema  # type: ignore
-from jscc.testing.filesystem import walk_json_data  # type: ignore
+from jscc.testing.filesystem import walk, walk_json_data  # type: ignore
 from referencing import Registry, Resource
 from referencing.jsonschema import DRAFT202012
 
+# Things loaded from schema files, shared by the whole process: {(kind, path): (stamp, value)}
+# where stamp is what _get_stamp gave just before loading
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def _get_stamp(path):
+    """Returns something that changes if any JSON file at path (a file, or a directory of them) changes."""
+    if os.path.isdir(path):
+        filenames = sorted(
+            str(file_path)
+            for file_path, _ in walk(top=path)
+            if file_path.suffix == ".json"
+        )
+    else:
+        filenames = [path]
+    stamp = []
+    for filename in filenames:
+        stat = os.stat(filename)
+        stamp.append((filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def cached(kind, path, load):
+    """Returns load(path), only calling it the first time (or the first time since the files at path changed,
+    as noticed by check_schema_files()).
+
+    kind names what is loaded (eg "registry"), so that different things can be loaded from the same path.
+    Looking something up doesn't look at the file system, so this is cheap to call as often as needed.
+    Values are shared by all callers, so must be treated as read only."""
+    key = (kind, os.path.abspath(path))
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry is not None:
+        return entry[1]
+    stamp = _get_stamp(path)
+    value = load(path)
+    with _cache_lock:
+        _cache[key] = (stamp, value)
+    return value
+
+
+def check_schema_files(path):
+    """Forgets everything loaded from path if any of the files there have changed since it was loaded,
+    so it is loaded again next time it is needed. The files are only looked at once, however much is cached.
+
+    SchemaBODS calls this when it is made, so each run sees the current schema files."""
+    path = os.path.abspath(path)
+    with _cache_lock:
+        stamps = {entry[0] for key, entry in _cache.items() if key[1] == path}
+    if not stamps:
+        return
+    try:
+        stamp = _get_stamp(path)
+    except OSError:
+        # The files have gone
+        stamp = None
+    with _cache_lock:
+        for key in [
+            key for key, entry in _cache.items() if key[1] == path and entry[0] != stamp
+        ]:
+            del _cache[key]
+
+
+def clear_schema_cache():
+    """Forgets everything loaded from schema files, so it is loaded again next time it is needed."""
+    with _cache_lock:
+        _cache.clear()
+
 
 def get_schema_paths(schema_dir):
     """
@@ -23,7 +94,13 @@ def schema_registry(schema_dir):
     """
     This loads the BODS schema files into a jsonschema registry, so the
     validator can resolve $refs across all of the schema files.
+
+    The registry is only built once per process (unless the files change) and is shared by all callers.
     """
+    return cached("registry", schema_dir, _build_schema_registry)
+
+
+def _build_schema_registry(schema_dir):
     schemas = []
     for _, _, schema in get_schema_paths(schema_dir):
         schemas.append(
@@ -34,8 +111,99 @@ def schema_registry(schema_dir):
     return registry
 
 
+# The component schema files in a schema directory (0.4 and above)
+COMPONENTS = ("entity", "person", "relationship", "statement", "components")
+
+
+class ComponentIndex:
+    """
+    The component schema files in a schema directory (0.4 and above), loaded once,
+    with the lists of allowed values that tasks need worked out from them.
+
+    The lists are tuples (in schema order, as some outputs depend on it),
+    and each has a frozenset version (with _set on the end of the name) for quick "in" checks.
+    This is shared by all callers, so must be treated as read only.
+    """
+
+    def __init__(self, schema_dir):
+        self._components = {}
+        for file_path in sorted(Path(schema_dir).glob("*.json")):
+            for component in COMPONENTS:
+                if (
+                    file_path.name.startswith(component)
+                    and component not in self._components
+                ):
+                    with open(file_path) as json_file:
+                        self._components[component] = json.load(json_file)
+
+        entity = self._components.get("entity", {})
+        person = self._components.get("person", {})
+        interest = (
+            self._components.get("relationship", {})
+            .get("$defs", {})
+            .get("Interest", {})
+        )
+        self.entity_types = _get_enum(
+            entity, "properties", "entityType", "properties", "type"
+        )
+        self.person_types = _get_enum(person, "properties", "personType")
+        self.interest_types = _get_enum(interest, "properties", "type")
+        self.interest_direct_or_indirect = _get_enum(
+            interest, "properties", "directOrIndirect"
+        )
+        self.political_exposure_statuses = _get_enum(
+            person, "properties", "politicalExposure", "properties", "status"
+        )
+        self.entity_types_set = frozenset(self.entity_types)
+        self.person_types_set = frozenset(self.person_types)
+        self.interest_types_set = frozenset(self.interest_types)
+        self.interest_direct_or_indirect_set = frozenset(
+            self.interest_direct_or_indirect
+        )
+        self.political_exposure_statuses_set = frozenset(
+            self.political_exposure_statuses
+        )
+
+    def get(self, component):
+        """Returns the parsed JSON of the schema file for a component (eg "entity"), or None if there isn't one."""
+        return self._components.get(component)
+
+
+def _get_enum(schema, *keys) -> tuple:
+    for key in keys:
+        schema = schema.get(key, {})
+    return tuple(schema.get("enum", ()))
+
+
+def get_component_index(schema_dir) -> ComponentIndex:
+    """
+    Returns the ComponentIndex for a schema directory.
+    It is only built once per process (unless the files change) and is shared by all callers.
+    """
+    return cached("component_index", schema_dir, ComponentIndex)
+
+
 def get_scheme_file_data(schema_dir, component):
+    """
+    Returns the parsed JSON of the schema file for a component (eg "entity").
+    This is shared by all callers, so must be treated as read only.
+    """
+    if component in COMPONENTS:
+        return get_component_index(schema_dir).get(component)
     for file_path in Path(schema_dir).glob("*.json"):
         if file_path.name.startswith(component):
             with open(file_path) as json_file:
                 return json.load(json_file)
+
+
+def get_schema_file_data(schema_file):
+    """
+    Returns the parsed JSON of a single schema file (as used for BODS 0.1 to 0.3).
+    This is shared by all callers, so must be treated as read only.
+    """
+    return cached("file", schema_file, _load_schema_file_data)
+
+
+def _load_schema_file_data(schema_file):
+    with open(schema_file) as fp:
+        return json.load(fp)
@@ -0,0 +1,140 @@
+import functools
+from urllib.parse import urlparse
+
+from libcove2.common import schema_dict_fields_generator  # type: ignore
+from packaging import version as packaging_version
+
+from libcovebods.schema_dir import (
+    cached,
+    get_component_index,
+    get_schema_file_data,
+    schema_registry,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def parse_version(version):
+    """packaging.version.parse, but each version string is only parsed once."""
+    return packaging_version.parse(version)
+
+
+class SchemaFacts:
+    """
+    Facts about one version of the schema that tasks and validators need,
+    worked out once from the schema files and then shared by everything that uses that version.
+
+    The lists of allowed values are tuples (in schema order, as some outputs depend on it),
+    and each has a frozenset version (with _set on the end of the name) for quick "in" checks.
+
+    Read only; use get_schema_facts() to get one.
+    """
+
+    schema_version: str
+    # Parsed, for comparing with other versions
+    version: packaging_version.Version
+    version_tuple: tuple
+    entity_types: tuple
+    entity_types_set: frozenset
+    person_types: tuple
+    person_types_set: frozenset
+    interest_types: tuple
+    interest_types_set: frozenset
+    interest_direct_or_indirect: tuple
+    interest_direct_or_indirect_set: frozenset
+    political_exposure_statuses: tuple
+    political_exposure_statuses_set: frozenset
+    address_types_allowed_in_entity_statement: tuple
+    address_types_allowed_in_person_statement: tuple
+    # All the fields in the schema, as paths like "/names/fullName"
+    package_schema_fields: frozenset
+
+    def __init__(self, schema_version, pkg_schema_url):
+        set_ = super().__setattr__
+        set_("schema_version", schema_version)
+        set_("version", parse_version(schema_version))
+        set_("version_tuple", self.version.release)
+
+        if self.version >= parse_version("0.4"):
+            component_index = get_component_index(pkg_schema_url)
+            entity_types = component_index.entity_types
+            person_types = component_index.person_types
+            interest_types = component_index.interest_types
+            interest_direct_or_indirect = component_index.interest_direct_or_indirect
+            political_exposure_statuses = component_index.political_exposure_statuses
+            registry = schema_registry(pkg_schema_url)
+            package_schema_fields = schema_dict_fields_generator(
+                registry.contents("urn:statement"), registry=registry
+            )
+        else:
+            pkg_schema_obj = get_schema_file_data(pkg_schema_url)
+            statement_schemas = {
+                statement_schema["properties"]["statementType"]["enum"][0]: (
+                    statement_schema["properties"]
+                )
+                for statement_schema in pkg_schema_obj["items"]["oneOf"]
+            }
+            entity = statement_schemas.get("entityStatement", {})
+            person = statement_schemas.get("personStatement", {})
+            interest = statement_schemas.get("ownershipOrControlStatement", {})
+            interest = interest.get("interests", {}).get("items", {})
+            interest = interest.get("properties", {})
+            entity_types = tuple(entity.get("entityType", {}).get("enum", ()))
+            person_types = tuple(person.get("personType", {}).get("enum", ()))
+            interest_types = tuple(interest.get("type", {}).get("enum", ()))
+            # These are only available in 0.3 and above.
+            interest_direct_or_indirect = tuple(
+                interest.get("directOrIndirect", {}).get("enum", ())
+            )
+            political_exposure_statuses = tuple(
+                person.get("politicalExposure", {})
+                .get("properties", {})
+                .get("status", {})
+                .get("enum", ())
+            )
+            package_schema_fields = schema_dict_fields_generator(pkg_schema_obj)
+
+        set_("entity_types", entity_types)
+        set_("entity_types_set", frozenset(entity_types))
+        set_("person_types", person_types)
+        set_("person_types_set", frozenset(person_types))
+        set_("interest_types", interest_types)
+        set_("interest_types_set", frozenset(interest_types))
+        set_("interest_direct_or_indirect", interest_direct_or_indirect)
+        set_("interest_direct_or_indirect_set", frozenset(interest_direct_or_indirect))
+        set_("political_exposure_statuses", political_exposure_statuses)
+        set_("political_exposure_statuses_set", frozenset(political_exposure_statuses))
+        set_(
+            "address_types_allowed_in_entity_statement",
+            ("registered", "business", "alternative"),
+        )
+        set_(
+            "address_types_allowed_in_person_statement",
+            ("placeOfBirth", "residence", "service", "alternative"),
+        )
+        set_("package_schema_fields", frozenset(package_schema_fields))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SchemaFacts are read only")
+
+    def __delattr__(self, name):
+        raise AttributeError("SchemaFacts are read only")
+
+    def __repr__(self):
+        return f"SchemaFacts({self.schema_version!r})"
+
+
+def get_schema_facts(schema_version, pkg_schema_url) -> SchemaFacts:
+    """
+    Returns the SchemaFacts for a schema version, with the schema files at pkg_schema_url.
+    They are only worked out once per process (unless the files change) and are shared by all callers.
+    """
+    uri_scheme = urlparse(pkg_schema_url).scheme
+    if uri_scheme == "http" or uri_scheme == "https":
+        raise NotImplementedError(
+            "Downloading schema files over HTTP/HTTPS is not supported"
+        )
+    return cached(
+        ("schema_facts", schema_version),
+        pkg_schema_url,
+        lambda path: SchemaFacts(schema_version, path),
+    )
@@ -0,0 +1,357 @@
+import codecs
+import json
+import mmap
+import os
+import re
+from array import array
+
+STATEMENT_INDEX_SUFFIX = ".bodsidx"
+
+# Sidecar files start with this, then the size and modification time of the data file they index
+_STATEMENT_INDEX_MAGIC = b"BODSIDX1"
+
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# How much of the data to decode to text at a time. Grows if a single item is bigger than this.
+_WINDOW_SIZE = 16 * 1024 * 1024
+
+# The most to read from a file object at once
+_STREAM_READ_SIZE = 1024 * 1024
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+_NON_WHITESPACE_RE = re.compile(rb"\S")
+
+_NEWLINE_RE = re.compile(rb"\n")
+
+# Keys that statements have and other objects in BODS data don't (statementID is from before 0.4)
+_STATEMENT_KEYS = frozenset(
+    ("statementId", "statementID", "statementType", "recordType")
+)
+
+
+class StatementIndexError(ValueError):
+    """The data could not be indexed, because it is not a JSON array."""
+
+
+class _BufferSource:
+    """Gives _Window the bytes it needs from bytes or an mmap."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+
+    def read(self, start, size):
+        """Returns (the bytes from start, up to size of them; whether that reaches the end of the data)."""
+        data = self._buffer[start : start + size]
+        return data, start + len(data) >= len(self._buffer)
+
+
+class _StreamSource:
+    """Gives _Window the bytes it needs from a binary file object, reading it once from start to finish.
+
+    Only the bytes from the start of the current window are kept, so the start must never go backwards."""
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._start = 0
+        self._data = b""
+        self._at_end = False
+
+    def read(self, start, size):
+        data = self._data[start - self._start :]
+        parts = [data]
+        length = len(data)
+        while length < size and not self._at_end:
+            # Reading in pieces stops the file object allocating a whole window's worth for a small file
+            more = self._fp.read(min(size - length, _STREAM_READ_SIZE))
+            if not more:
+                self._at_end = True
+            parts.append(more)
+            length += len(more)
+        self._start = start
+        self._data = b"".join(parts)
+        return self._data[:size], self._at_end and len(self._data) <= size
+
+
+class _Window:
+    """Part of the data, decoded to text, with a way to turn positions in the text back into byte offsets.
+
+    char_start, line and column are where the text starts in the whole of the data, as the json module counts them
+    (in characters, with line and column starting at 1), so errors can say where they are in the whole data."""
+
+    def __init__(self, source, byte_start, size, char_start=0, line=1, column=1):
+        chunk, self.at_end_of_data = source.read(byte_start, size)
+        # A multi-byte character may be cut off at the end of the chunk; the incremental decoder leaves it out
+        self.text = codecs.getincrementaldecoder("utf-8")().decode(
+            chunk, final=self.at_end_of_data
+        )
+        self.char_start = char_start
+        self.line = line
+        self.column = column
+        self._ascii = self.text.isascii()
+        self._byte_position = byte_start
+        self._text_position = 0
+
+    def move_to(self, source, text_position, size):
+        """Returns a new window of size bytes, starting at a position in this one's text."""
+        newlines = self.text.count("\n", 0, text_position)
+        if newlines:
+            column = text_position - self.text.rfind("\n", 0, text_position)
+        else:
+            column = self.column + text_position
+        return _Window(
+            source,
+            self.byte_offset(text_position),
+            size,
+            char_start=self.char_start + text_position,
+            line=self.line + newlines,
+            column=column,
+        )
+
+    def decode_error(self, msg, text_position):
+        """Returns a json.JSONDecodeError for a position in the text, that says where it is in the whole data."""
+        return self.move_error(json.JSONDecodeError(msg, self.text, text_position))
+
+    def move_error(self, error):
+        """Changes a json.JSONDecodeError for the text to say where it is in the whole data, and returns it."""
+        if error.lineno == 1:
+            error.colno += self.column - 1
+        error.lineno += self.line - 1
+        error.pos += self.char_start
+        error.args = (
+            "%s: line %d column %d (char %d)"
+            % (error.msg, error.lineno, error.colno, error.pos),
+        )
+        return error
+
+    def byte_offset(self, text_position):
+        """Returns the byte offset in the data of a position in the text. Positions must not go backwards."""
+        if self._ascii:
+            self._byte_position += text_position - self._text_position
+        else:
+            self._byte_position += len(
+                self.text[self._text_position : text_position].encode("utf-8")
+            )
+        self._text_position = text_position
+        return self._byte_position
+
+
+# Where iter_json_array_items is up to
+_BEFORE_ARRAY = 0
+_FIRST_ITEM_OR_END = 1
+_ITEM = 2
+_COMMA_OR_END = 3
+_AFTER_ARRAY = 4
+
+
+def iter_json_array_items(data, parse_float=None):
+    """Yields (start, end, item) for each item in a top level JSON array.
+
+    start and end are byte offsets, so data[start:end] is the JSON for that item.
+    data can be bytes, an mmap or a binary file object (which is read once, from the start).
+    Only a window of data is decoded at a time, so memory use does not depend on the size of the data.
+    The items are parsed with the json module's C decoder, so they are exactly what json.load would give
+    and building offsets this way costs little more than parsing the data.
+    Raises StatementIndexError if the data is not a JSON array, and json.JSONDecodeError if it is not valid JSON."""
+    decoder = json.JSONDecoder(parse_float=parse_float)
+    source = (
+        _StreamSource(data)
+        if hasattr(data, "read") and not isinstance(data, mmap.mmap)
+        else _BufferSource(data)
+    )
+    window_size = _WINDOW_SIZE
+    window = _Window(source, 0, window_size)
+    position = 1 if window.text[:1] == "\ufeff" else 0
+    state = _BEFORE_ARRAY
+    while True:
+        position = _WHITESPACE_RE.match(window.text, position).end()
+        if position >= len(window.text):
+            if window.at_end_of_data:
+                break
+            window = window.move_to(source, position, window_size)
+            position = 0
+            continue
+        char = window.text[position]
+        if state == _BEFORE_ARRAY:
+            if char != "[":
+                raise StatementIndexError("Data is not a JSON array")
+            position += 1
+            state = _FIRST_ITEM_OR_END
+        elif state == _AFTER_ARRAY:
+            raise window.decode_error("Extra data", position)
+        elif char == "]" and state in (_FIRST_ITEM_OR_END, _COMMA_OR_END):
+            position += 1
+            state = _AFTER_ARRAY
+        elif state == _COMMA_OR_END:
+            if char != ",":
+                raise window.decode_error("Expecting ',' delimiter", position)
+            position += 1
+            state = _ITEM
+        else:
+            try:
+                item, end = decoder.raw_decode(window.text, position)
+                # A number cut off at the end of the window still decodes, so we need to see what comes after
+                complete = window.at_end_of_data or (
+                    _WHITESPACE_RE.match(window.text, end).end() < len(window.text)
+                )
+            except json.JSONDecodeError as e:
+                # Only read more if the error could be because the window cut the item off.
+                # Otherwise the item is bad, and reading more would only decode the rest of the data at once.
+                if window.at_end_of_data or not _may_be_cut_off(e, window.text):
+                    raise window.move_error(e)
+                complete = False
+            if not complete:
+                # The item runs past the end of the window. Start a new, bigger, window at the start of the item.
+                if position == 0:
+                    window_size *= 2
+                window = window.move_to(source, position, window_size)
+                position = 0
+                continue
+            yield window.byte_offset(position), window.byte_offset(end), item
+            position = end
+            state = _COMMA_OR_END
+    if state == _BEFORE_ARRAY:
+        raise StatementIndexError("Data is not a JSON array")
+    if state != _AFTER_ARRAY:
+        raise window.decode_error("Unexpected end of JSON array", position)
+
+
+def _may_be_cut_off(error, text):
+    """Returns whether a json.JSONDecodeError from decoding text could be because the text stops part way
+    through the JSON, rather than because the JSON is bad."""
+    return error.pos >= len(text) - 32 or error.msg.startswith("Unterminated")
+
+
+def iter_json_array_spans(buffer):
+    """Yields (start, end) byte offsets of each item in a top level JSON array."""
+    for start, end, _ in iter_json_array_items(buffer):
+        yield start, end
+
+
+def iter_json_lines_spans(buffer):
+    """Yields (start, end) byte offsets of each line with something on it in JSON Lines data."""
+    return iter_json_lines_spans_from(buffer, 3 if buffer[:3] == UTF8_BOM else 0)
+
+
+def iter_json_lines_spans_from(buffer, position):
+    """Like iter_json_lines_spans, but starts at position, which must be the start of a line."""
+    length = len(buffer)
+    while position < length:
+        line_end = buffer.find(b"\n", position)
+        if line_end == -1:
+            line_end = length
+        start = _first_non_whitespace(buffer, position, line_end)
+        if start is not None:
+            yield start, line_end
+        position = line_end + 1
+
+
+def find_json_lines_item_at(buffer, offset, parse_float=None):
+    """Returns (start, end, item) for the first line with something on it that starts at or after offset
+    in JSON Lines data, or None if there isn't one.
+
+    Raises ValueError if that line is not valid JSON."""
+    if offset > 0 and buffer[offset - 1 : offset] != b"\n":
+        offset = buffer.find(b"\n", offset) + 1
+        if offset == 0:
+            return None
+    elif offset == 0 and buffer[:3] == UTF8_BOM:
+        offset = 3
+    for start, end in iter_json_lines_spans_from(buffer, offset):
+        return start, end, json.loads(buffer[start:end], parse_float=parse_float)
+    return None
+
+
+def find_json_array_item_at(buffer, offset, parse_float=None, window_size=64 * 1024):
+    """Returns (start, end, item) for the first statement that starts at or after offset
+    in a top level JSON array, or None if there isn't one.
+
+    We can't know where we are in the JSON without reading it all from the start, so this
+    looks for an object straight after a "[" or "," that has one of _STATEMENT_KEYS.
+    That is true of statements, and in BODS data nothing else looks like that."""
+    decoder = json.JSONDecoder(parse_float=parse_float)
+    length = len(buffer)
+    position = buffer.find(b"{", offset)
+    while position != -1:
+        if _last_non_whitespace_byte(buffer, position) in (b"[", b","):
+            size = window_size
+            while True:
+                chunk = buffer[position : position + size]
+                at_end_of_data = position + len(chunk) >= length
+                text = codecs.getincrementaldecoder("utf-8")().decode(
+                    chunk, final=at_end_of_data
+                )
+                try:
+                    item, end = decoder.raw_decode(text)
+                except json.JSONDecodeError as e:
+                    # Only read more if the error could be because the window cut the object off
+                    if at_end_of_data or not _may_be_cut_off(e, text):
+                        break
+                    size *= 2
+                    continue
+                if isinstance(item, dict) and not _STATEMENT_KEYS.isdisjoint(item):
+                    return position, position + len(text[:end].encode("utf-8")), item
+                break
+        position = buffer.find(b"{", position + 1)
+    return None
+
+
+def line_number_at(buffer, offset) -> int:
+    """Returns the line number (starting at 1) of a byte offset."""
+    # mmap objects have no count() method
+    return sum(1 for _ in _NEWLINE_RE.finditer(buffer, 0, offset)) + 1
+
+
+def save_statement_index(index_filename, data_filename, offsets: array):
+    """Saves offsets (as made by DataReader) to a sidecar file.
+
+    The size and modification time of the data file are stored too, so a stale index is never loaded."""
+    stat = os.stat(data_filename)
+    header = array("q", [stat.st_size, stat.st_mtime_ns, len(offsets)])
+    # Write to a temporary file and move it, so a half written index is never loaded
+    temp_filename = index_filename + ".tmp"
+    with open(temp_filename, "wb") as fp:
+        fp.write(_STATEMENT_INDEX_MAGIC)
+        header.tofile(fp)
+        offsets.tofile(fp)
+    os.replace(temp_filename, index_filename)
+
+
+def load_statement_index(index_filename, data_filename):
+    """Loads offsets from a sidecar file, or returns None if there is no usable index for the data file."""
+    try:
+        stat = os.stat(data_filename)
+        with open(index_filename, "rb") as fp:
+            if fp.read(len(_STATEMENT_INDEX_MAGIC)) != _STATEMENT_INDEX_MAGIC:
+                return None
+            header = array("q")
+            header.fromfile(fp, 3)
+            if header[0] != stat.st_size or header[1] != stat.st_mtime_ns:
+                return None
+            offsets = array("q")
+            offsets.fromfile(fp, header[2])
+            return offsets
+    except (OSError, EOFError):
+        return None
+
+
+def _last_non_whitespace_byte(buffer, end):
+    """Returns the last byte before end that is not whitespace, or b"" if there isn't one."""
+    position = end - 1
+    while position >= 0 and buffer[position : position + 1] in (
+        b" ",
+        b"\t",
+        b"\n",
+        b"\r",
+    ):
+        position -= 1
+    return buffer[position : position + 1] if position >= 0 else b""
+
+
+def _first_non_whitespace(buffer, start, end=None):
+    match = (
+        _NON_WHITESPACE_RE.search(buffer, start)
+        if end is None
+        else _NON_WHITESPACE_RE.search(buffer, start, end)
+    )
+    return match.start() if match else None
@@ -1,3 +1,4 @@
+from array import array
 from collections import defaultdict
 from datetime import datetime
 
@@ -6,7 +7,12 @@ import pycountry
 from libcove2.common import get_orgids_prefixes  # type: ignore
 
 from libcovebods.base_task import AdditionalCheck
-from libcovebods.utils import numeric_value, parse_date_field, sort_by_date
+from libcovebods.record_index import (
+    RECORD_TYPE_ENTITY,
+    RECORD_TYPE_PERSON,
+    RecordColumn,
+)
+from libcovebods.utils import numeric_value, parse_date_field
 
 
 class CheckHasPublicListingRecord(AdditionalCheck):
@@ -490,24 +496,21 @@ class CheckStatementRelationshipInterestsShareValues(AdditionalCheck):
 
 
 class CheckStatementDeclarationSubject(AdditionalCheck):
-    def __init__(self, lib_cove_bods_config, schema_object):
-        super().__init__(lib_cove_bods_config, schema_object)
-        self._statements = {}
+    uses_record_index = True
 
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
-    def check_statement_first_pass(self, statement):
-        if "recordId" in statement and "recordType" in statement:
-            if statement["recordId"] in self._statements:
-                self._statements[statement["recordId"]].append(statement["recordType"])
-            else:
-                self._statements[statement["recordId"]] = [statement["recordType"]]
-
     def check_statement_second_pass(self, statement):
         if "declarationSubject" in statement:
-            if statement["declarationSubject"] not in self._statements:
+            record_number = self._record_index.get_record_number(
+                statement["declarationSubject"]
+            )
+            if (
+                record_number is None
+                or not self._record_index.record_types_seen[record_number]
+            ):
                 self._additional_check_results.append(
                     {
                         "type": "statement_declaration_subject_not_exist",
@@ -517,42 +520,40 @@ class CheckStatementDeclarationSubject(AdditionalCheck):
                     }
                 )
             else:
-                for record_type in self._statements[statement["declarationSubject"]]:
-                    if record_type not in ("entity", "person"):
-                        self._additional_check_results.append(
-                            {
-                                "type": "statement_declaration_subject_not_entity_person",
-                                "statement_type": None,
-                                "record_id": statement["declarationSubject"],
-                                "record_type": record_type,
-                                "statement": statement.get("statementId"),
-                            }
-                        )
+                for (
+                    record_type
+                ) in self._record_index.get_record_types_not_entity_or_person(
+                    record_number
+                ):
+                    self._additional_check_results.append(
+                        {
+                            "type": "statement_declaration_subject_not_entity_person",
+                            "statement_type": None,
+                            "record_id": statement["declarationSubject"],
+                            "record_type": record_type,
+                            "statement": statement.get("statementId"),
+                        }
+                    )
 
 
 class CheckStatementIsComponent(AdditionalCheck):
-    def __init__(self, lib_cove_bods_config, schema_object):
-        super().__init__(lib_cove_bods_config, schema_object)
-        self._count = 0
-        self._statements = {}
-        self._components = {}
+    uses_record_index = True
 
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
-    def check_statement_first_pass(self, statement):
-        if "recordId" in statement:
-            self._statements[statement["recordId"]] = self._count
-            self._count += 1
-            if (
-                "recordDetails" in statement
-                and isinstance(statement["recordDetails"], dict)
-                and "componentRecords" in statement["recordDetails"]
-                and isinstance(statement["recordDetails"]["componentRecords"], list)
-            ):
-                for component_id in statement["recordDetails"]["componentRecords"]:
-                    self._components[component_id] = statement["recordId"]
+    def _is_in_later_component_records(self, record_id):
+        # Is the record listed in the componentRecords of a record that comes later in the data?
+        record_number = self._record_index.get_record_number(record_id)
+        if record_number is None:
+            return False
+        parent_number = self._record_index.component_parent[record_number]
+        return (
+            parent_number != -1
+            and self._record_index.last_position[record_number]
+            < self._record_index.last_position[parent_number]
+        )
 
     def check_statement_second_pass(self, statement):
         if (
@@ -562,10 +563,7 @@ class CheckStatementIsComponent(AdditionalCheck):
             and "isComponent" in statement["recordDetails"]
         ):
             if statement["recordDetails"]["isComponent"] is True:
-                if statement["recordId"] not in self._components or not (
-                    self._statements[statement["recordId"]]
-                    < self._statements[self._components[statement["recordId"]]]
-                ):
+                if not self._is_in_later_component_records(statement["recordId"]):
                     if "recordType" in statement:
                         if statement["recordType"] == "entity":
                             self._additional_check_results.append(
@@ -622,109 +620,203 @@ class CheckStatementDuplicateStatementId(AdditionalCheck):
 
 
 class CheckStatementSeries(AdditionalCheck):
+    """Checks the statements for each record, in order of statementDate.
+
+    Instead of keeping every statement until the end, this keeps a few numbers for each record
+    (see RecordColumn) and updates them as statements are seen."""
+
+    uses_record_index = True
+
+    # Codes for recordStatus
+    _OTHER_STATUS = 0
+    _NEW = 1
+    _CLOSED = 2
+
+    # Problems that can be found with a series (in order of checking; only the first is reported)
+    _MULTIPLE_NEW = 1
+    _NEW_NOT_FIRST = 2
+    _MULTIPLE_CLOSED = 3
+    _CLOSED_NOT_LAST = 4
+    _DIFFERENT_RECORD_TYPES = 5
+
     def __init__(self, lib_cove_bods_config, schema_object):
         super().__init__(lib_cove_bods_config, schema_object)
-        self._count = 0
-        self._series = {}
-        self._components = {}
+        # Records in order of their first statement with a statementDate
+        self._series = array("i")
+        self._in_series = RecordColumn("B")
+        # Counts of new and closed statuses (only 0, 1 or "more than 1" matters, so these stop at 2)
+        self._new_count = RecordColumn("B")
+        self._closed_count = RecordColumn("B")
+        # The first statement with the earliest date and the last statement with the latest date.
+        # The earliest is identified by its position in the statements with a statementDate.
+        self._earliest_date = RecordColumn("i")
+        self._earliest_position = RecordColumn("q", -1)
+        self._earliest_status = RecordColumn("B")
+        self._latest_date = RecordColumn("i")
+        self._latest_status = RecordColumn("B")
+        # The recordType of the first statement (as a number from RecordIndex.values)
+        # and whether any other statement has a different one
+        self._first_record_type = RecordColumn("i")
+        self._different_record_types = RecordColumn("B")
+        # Positions are counted in each pass, and statementIds are collected in the second pass,
+        # only for the statements that are needed in the results.
+        self._first_pass_position = 0
+        self._second_pass_position = 0
+        self._statement_ids = {}
 
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
-    def check_statement_first_pass(self, statement):
-        if (
+    @staticmethod
+    def _is_in_series(statement):
+        return (
             "recordId" in statement
             and "statementDate" in statement
-            and "statementDate" in statement
             and statement["statementDate"]
+        )
+
+    def check_statement_first_pass(self, statement):
+        if not self._is_in_series(statement):
+            return
+        position = self._first_pass_position
+        self._first_pass_position += 1
+        record_number = self._record_index.get_record_number(statement["recordId"])
+        if record_number is None:
+            return
+        if not self._in_series[record_number]:
+            self._in_series[record_number] = 1
+            self._series.append(record_number)
+
+        statement_date = parse_date_field(statement["statementDate"])
+        if not statement_date:
+            # Statements with dates that can't be read are left out of the series
+            return
+        statement_date_ordinal = statement_date.toordinal()
+        record_status = statement.get("recordStatus")
+        if record_status == "new":
+            status = self._NEW
+            self._new_count[record_number] = min(self._new_count[record_number] + 1, 2)
+        elif record_status == "closed":
+            status = self._CLOSED
+            self._closed_count[record_number] = min(
+                self._closed_count[record_number] + 1, 2
+            )
+        else:
+            status = self._OTHER_STATUS
+        record_type = self._record_index.values.add(statement.get("recordType"))
+
+        if self._earliest_position[record_number] == -1:
+            self._earliest_date[record_number] = statement_date_ordinal
+            self._earliest_position[record_number] = position
+            self._earliest_status[record_number] = status
+            self._latest_date[record_number] = statement_date_ordinal
+            self._latest_status[record_number] = status
+            self._first_record_type[record_number] = record_type
+            return
+        if statement_date_ordinal < self._earliest_date[record_number]:
+            self._earliest_date[record_number] = statement_date_ordinal
+            self._earliest_position[record_number] = position
+            self._earliest_status[record_number] = status
+        if statement_date_ordinal >= self._latest_date[record_number]:
+            self._latest_date[record_number] = statement_date_ordinal
+            self._latest_status[record_number] = status
+        if record_type != self._first_record_type[record_number]:
+            self._different_record_types[record_number] = 1
+
+    def _get_problem(self, record_number):
+        if self._new_count[record_number] > 1:
+            return self._MULTIPLE_NEW
+        elif self._new_count[record_number] and not (
+            self._earliest_status[record_number] == self._NEW
         ):
-            record_status = statement.get("recordStatus")
-            record_type = statement.get("recordType")
-            statement_id = statement.get("statementId")
-            if statement["recordId"] in self._series:
-                self._series[statement["recordId"]].append(
-                    [
-                        statement["statementDate"],
-                        record_status,
-                        record_type,
-                        statement_id,
-                    ]
-                )
-            else:
-                self._series[statement["recordId"]] = [
-                    [
-                        statement["statementDate"],
-                        record_status,
-                        record_type,
-                        statement_id,
-                    ]
-                ]
+            return self._NEW_NOT_FIRST
+        elif self._closed_count[record_number] > 1:
+            return self._MULTIPLE_CLOSED
+        elif self._closed_count[record_number] and not (
+            self._latest_status[record_number] == self._CLOSED
+        ):
+            return self._CLOSED_NOT_LAST
+        elif self._different_record_types[record_number]:
+            return self._DIFFERENT_RECORD_TYPES
+        return None
+
+    def check_statement_second_pass(self, statement):
+        if not self._is_in_series(statement):
+            return
+        position = self._second_pass_position
+        self._second_pass_position += 1
+        record_number = self._record_index.get_record_number(statement["recordId"])
+        if (
+            record_number is not None
+            and self._earliest_position[record_number] == position
+            and self._get_problem(record_number)
+            in (self._NEW_NOT_FIRST, self._CLOSED_NOT_LAST)
+        ):
+            self._statement_ids[record_number] = statement.get("statementId")
 
     def final_checks(self):
-        for series in self._series:
-            sorted_series = sort_by_date(self._series[series], 0)
-            statuses = [s[1] for s in sorted_series]
-            types = [s[2] for s in sorted_series]
-            if len([s for s in statuses if s == "new"]) > 1:
+        for record_number in self._series:
+            problem = self._get_problem(record_number)
+            record_id = self._record_index.record_ids[record_number]
+            if problem == self._MULTIPLE_NEW:
                 self._additional_check_results.append(
                     {
                         "type": "multiple_statements_in_series_with_record_status_new",
                         "statement_type": None,
-                        "record_id": series,
+                        "record_id": record_id,
                     }
                 )
-            elif "new" in statuses and statuses[0] != "new":
+            elif problem == self._NEW_NOT_FIRST:
                 self._additional_check_results.append(
                     {
                         "type": "statement_with_record_status_new_must_be_first",
                         "statement_type": None,
-                        "record_id": series,
-                        "statement_id": sorted_series[0][-1],
+                        "record_id": record_id,
+                        "statement_id": self._statement_ids.get(record_number),
                     }
                 )
-            elif len([s for s in statuses if s == "closed"]) > 1:
+            elif problem == self._MULTIPLE_CLOSED:
                 self._additional_check_results.append(
                     {
                         "type": "multiple_statements_in_series_with_record_status_closed",
                         "statement_type": None,
-                        "record_id": series,
+                        "record_id": record_id,
                     }
                 )
-            elif "closed" in statuses and statuses[-1] != "closed":
+            elif problem == self._CLOSED_NOT_LAST:
                 self._additional_check_results.append(
                     {
                         "type": "statement_with_record_status_closed_must_be_last",
                         "statement_type": None,
-                        "record_id": series,
-                        "statement_id": sorted_series[0][-1],
+                        "record_id": record_id,
+                        "statement_id": self._statement_ids.get(record_number),
                     }
                 )
-            elif len(set(types)) > 1:
+            elif problem == self._DIFFERENT_RECORD_TYPES:
                 self._additional_check_results.append(
                     {
                         "type": "statements_in_series_with_different_record_types",
                         "statement_type": None,
-                        "record_id": series,
+                        "record_id": record_id,
                     }
                 )
 
 
 class CheckComponentRecordsRecordIds(AdditionalCheck):
+    uses_record_index = True
+
     def __init__(self, lib_cove_bods_config, schema_object):
         super().__init__(lib_cove_bods_config, schema_object)
-        self._records = {}
-        self._statements = {}
+        self._statements = set()
 
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
     def check_statement_first_pass(self, statement):
-        if "recordId" in statement:
-            self._records[statement["recordId"]] = None
         if "statementId" in statement:
-            self._records[statement["statementId"]] = None
+            self._statements.add(statement["statementId"])
 
     def check_ownership_or_control_statement_second_pass(self, statement):
         if "recordDetails" in statement and isinstance(
@@ -734,7 +826,7 @@ class CheckComponentRecordsRecordIds(AdditionalCheck):
                 statement["recordDetails"]["componentRecords"], list
             ):
                 for component in statement["recordDetails"]["componentRecords"]:
-                    if component not in self._records:
+                    if not self._record_index.has_record(component):
                         if component in self._statements:
                             self._additional_check_results.append(
                                 {
@@ -756,18 +848,19 @@ class CheckComponentRecordsRecordIds(AdditionalCheck):
 
 
 class CheckStatementRelationshipParties(AdditionalCheck):
-    def __init__(self, lib_cove_bods_config, schema_object):
-        super().__init__(lib_cove_bods_config, schema_object)
-        self._records = {}
+    uses_record_index = True
 
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
-    def check_statement_first_pass(self, statement):
-        if "recordId" in statement:
-            record_type = statement.get("recordType")
-            self._records[statement["recordId"]] = record_type
+    def _get_record_type(self, record_id):
+        # The record type number of a record, or None if there is no such record
+        if not self._record_index.has_record(record_id):
+            return None
+        return self._record_index.record_type[
+            self._record_index.get_record_number(record_id)
+        ]
 
     def check_ownership_or_control_statement_second_pass(self, statement):
         if "recordDetails" in statement and isinstance(
@@ -776,7 +869,10 @@ class CheckStatementRelationshipParties(AdditionalCheck):
             if "subject" in statement["recordDetails"] and isinstance(
                 statement["recordDetails"]["subject"], str
             ):
-                if statement["recordDetails"]["subject"] not in self._records:
+                subject_record_type = self._get_record_type(
+                    statement["recordDetails"]["subject"]
+                )
+                if subject_record_type is None:
                     self._additional_check_results.append(
                         {
                             "type": "subject_must_be_record_id",
@@ -785,9 +881,7 @@ class CheckStatementRelationshipParties(AdditionalCheck):
                             "subject": statement["recordDetails"]["subject"],
                         }
                     )
-                elif (
-                    not self._records[statement["recordDetails"]["subject"]] == "entity"
-                ):
+                elif not subject_record_type == RECORD_TYPE_ENTITY:
                     self._additional_check_results.append(
                         {
                             "type": "subject_can_only_refer_to_entity",
@@ -799,7 +893,10 @@ class CheckStatementRelationshipParties(AdditionalCheck):
             if "interestedParty" in statement["recordDetails"] and isinstance(
                 statement["recordDetails"]["interestedParty"], str
             ):
-                if statement["recordDetails"]["interestedParty"] not in self._records:
+                interested_party_record_type = self._get_record_type(
+                    statement["recordDetails"]["interestedParty"]
+                )
+                if interested_party_record_type is None:
                     self._additional_check_results.append(
                         {
                             "type": "interested_party_must_be_record_id",
@@ -810,9 +907,10 @@ class CheckStatementRelationshipParties(AdditionalCheck):
                             ],
                         }
                     )
-                elif self._records[
-                    statement["recordDetails"]["interestedParty"]
-                ] not in ("entity", "person"):
+                elif interested_party_record_type not in (
+                    RECORD_TYPE_ENTITY,
+                    RECORD_TYPE_PERSON,
+                ):
                     self._additional_check_results.append(
                         {
                             "type": "interested_party_can_only_refer_to_entity_or_person",
@@ -833,10 +931,8 @@ class CheckStatementRelationshipParties(AdditionalCheck):
                                 and interest["beneficialOwnershipOrControl"] is True
                             ):
                                 if (
-                                    not self._records[
-                                        statement["recordDetails"]["interestedParty"]
-                                    ]
-                                    == "person"
+                                    not interested_party_record_type
+                                    == RECORD_TYPE_PERSON
                                 ):
                                     self._additional_check_results.append(
                                         {
@@ -878,29 +974,12 @@ class CheckAnnotationStatementPointerTarget(AdditionalCheck):
 
 
 class CheckStatementRelationshipInterests(AdditionalCheck):
-    def __init__(self, lib_cove_bods_config, schema_object):
-        super().__init__(lib_cove_bods_config, schema_object)
-        self._records = {}
+    uses_record_index = True
 
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
-    def check_statement_first_pass(self, statement):
-        if (
-            "recordId" in statement
-            and "recordDetails" in statement
-            and isinstance(statement["recordDetails"], dict)
-        ):
-            record_type = statement.get("recordType")
-            if record_type == "entity":
-                record_type_type = statement["recordDetails"].get("entityType")
-            elif record_type == "person":
-                record_type_type = statement["recordDetails"].get("personType")
-            else:
-                record_type_type = None
-            self._records[statement["recordId"]] = (record_type, record_type_type)
-
     def check_ownership_or_control_statement_second_pass(self, statement):
         if "recordDetails" in statement and isinstance(
             statement["recordDetails"], dict
@@ -908,126 +987,114 @@ class CheckStatementRelationshipInterests(AdditionalCheck):
             if "interests" in statement["recordDetails"] and isinstance(
                 statement["recordDetails"]["interests"], list
             ):
+                subject_record_number = None
+                if "subject" in statement["recordDetails"] and isinstance(
+                    statement["recordDetails"]["subject"], str
+                ):
+                    if self._record_index.has_record(
+                        statement["recordDetails"]["subject"]
+                    ):
+                        subject_record_number = self._record_index.get_record_number(
+                            statement["recordDetails"]["subject"]
+                        )
+                if subject_record_number is None:
+                    # No subject, or a subject that isn't a record (which CheckStatementRelationshipParties reports)
+                    return
+                subject_record_type = self._record_index.get_record_type(
+                    subject_record_number
+                )
+                subject_record_subtype = self._record_index.get_subtype(
+                    subject_record_number
+                )
                 for interest in statement["recordDetails"]["interests"]:
                     if "type" in interest and interest["type"] in (
                         "nominee",
                         "nominator",
                     ):
-                        if "subject" in statement["recordDetails"] and isinstance(
-                            statement["recordDetails"]["subject"], str
-                        ):
+                        if not subject_record_type == "entity":
+                            self._additional_check_results.append(
+                                {
+                                    "type": "relationship_interests_subject_should_be_entity_nomination_arrangement",
+                                    "statement_type": None,
+                                    "statement": statement.get("statementId"),
+                                    "subject_record_type": subject_record_type,
+                                    "subject_record_subtype": subject_record_subtype,
+                                }
+                            )
+                        else:
+                            entity_type = subject_record_subtype
                             if (
-                                not self._records[
-                                    statement["recordDetails"]["subject"]
-                                ][0]
-                                == "entity"
+                                not entity_type
+                                or not isinstance(statement["recordDetails"], dict)
+                                or "type" not in entity_type
+                                or not entity_type["type"] == "arrangement"
+                                or "subtype" not in entity_type
+                                or not entity_type["subtype"] == "nomination"
                             ):
                                 self._additional_check_results.append(
                                     {
                                         "type": "relationship_interests_subject_should_be_entity_nomination_arrangement",
                                         "statement_type": None,
                                         "statement": statement.get("statementId"),
-                                        "subject_record_type": self._records[
-                                            statement["recordDetails"]["subject"]
-                                        ][0],
-                                        "subject_record_subtype": self._records[
-                                            statement["recordDetails"]["subject"]
-                                        ][1],
+                                        "subject_record_type": subject_record_type,
+                                        "subject_record_subtype": subject_record_subtype,
                                     }
                                 )
-                            else:
-                                entity_type = self._records[
-                                    statement["recordDetails"]["subject"]
-                                ][1]
-                                if (
-                                    not entity_type
-                                    or not isinstance(statement["recordDetails"], dict)
-                                    or "type" not in entity_type
-                                    or not entity_type["type"] == "arrangement"
-                                    or "subtype" not in entity_type
-                                    or not entity_type["subtype"] == "nomination"
-                                ):
-                                    self._additional_check_results.append(
-                                        {
-                                            "type": "relationship_interests_subject_should_be_entity_nomination_arrangement",
-                                            "statement_type": None,
-                                            "statement": statement.get("statementId"),
-                                            "subject_record_type": self._records[
-                                                statement["recordDetails"]["subject"]
-                                            ][0],
-                                            "subject_record_subtype": self._records[
-                                                statement["recordDetails"]["subject"]
-                                            ][1],
-                                        }
-                                    )
                     elif "type" in interest and interest["type"] in (
                         "settlor",
                         "trustee",
                         "protector",
                     ):
-                        if "subject" in statement["recordDetails"] and isinstance(
-                            statement["recordDetails"]["subject"], str
-                        ):
+                        if not subject_record_type == "entity":
+                            self._additional_check_results.append(
+                                {
+                                    "type": "relationship_interests_subject_should_be_entity_trust",
+                                    "statement_type": None,
+                                    "statement": statement.get("statementId"),
+                                    "subject_record_type": subject_record_type,
+                                    "subject_record_subtype": subject_record_subtype,
+                                }
+                            )
+                        else:
+                            entity_type = subject_record_subtype
                             if (
-                                not self._records[
-                                    statement["recordDetails"]["subject"]
-                                ][0]
-                                == "entity"
+                                not entity_type
+                                or not isinstance(statement["recordDetails"], dict)
+                                or "subtype" not in entity_type
+                                or not entity_type["subtype"] == "trust"
                             ):
                                 self._additional_check_results.append(
                                     {
                                         "type": "relationship_interests_subject_should_be_entity_trust",
                                         "statement_type": None,
                                         "statement": statement.get("statementId"),
-                                        "subject_record_type": self._records[
-                                            statement["recordDetails"]["subject"]
-                                        ][0],
-                                        "subject_record_subtype": self._records[
-                                            statement["recordDetails"]["subject"]
-                                        ][1],
+                                        "subject_record_type": subject_record_type,
+                                        "subject_record_subtype": subject_record_subtype,
                                     }
                                 )
-                            else:
-                                entity_type = self._records[
-                                    statement["recordDetails"]["subject"]
-                                ][1]
-                                if (
-                                    not entity_type
-                                    or not isinstance(statement["recordDetails"], dict)
-                                    or "subtype" not in entity_type
-                                    or not entity_type["subtype"] == "trust"
-                                ):
-                                    self._additional_check_results.append(
-                                        {
-                                            "type": "relationship_interests_subject_should_be_entity_trust",
-                                            "statement_type": None,
-                                            "statement": statement.get("statementId"),
-                                            "subject_record_type": self._records[
-                                                statement["recordDetails"]["subject"]
-                                            ][0],
-                                            "subject_record_subtype": self._records[
-                                                statement["recordDetails"]["subject"]
-                                            ][1],
-                                        }
-                                    )
 
 
 class CheckStatementSerialisation(AdditionalCheck):
-    def __init__(self, lib_cove_bods_config, schema_object):
-        super().__init__(lib_cove_bods_config, schema_object)
-        self._count = 0
-        self._records = {}
-        self._components = {}
+    uses_record_index = True
 
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
-    def check_statement_first_pass(self, statement):
-        if "recordId" in statement:
-            self._count += 1
-            if statement["recordId"] not in self._records:
-                self._records[statement["recordId"]] = self._count
+    def _is_first_seen_after(self, record_id, other_record_id):
+        # Does the first statement for record_id come after the first statement for other_record_id?
+        if not self._record_index.has_record(
+            record_id
+        ) or not self._record_index.has_record(other_record_id):
+            return False
+        return (
+            self._record_index.first_position[
+                self._record_index.get_record_number(record_id)
+            ]
+            > self._record_index.first_position[
+                self._record_index.get_record_number(other_record_id)
+            ]
+        )
 
     def check_ownership_or_control_statement_second_pass(self, statement):
         if (
@@ -1038,19 +1105,17 @@ class CheckStatementSerialisation(AdditionalCheck):
             if "subject" in statement["recordDetails"] and isinstance(
                 statement["recordDetails"]["subject"], str
             ):
-                if statement["recordDetails"]["subject"] in self._records:
-                    if (
-                        self._records[statement["recordDetails"]["subject"]]
-                        > self._records[statement["recordId"]]
-                    ):
-                        self._additional_check_results.append(
-                            {
-                                "type": "relationship_subject_not_before_relationship_in_dataset",
-                                "statement_type": None,
-                                "statement": statement.get("statementId"),
-                                "subject_id": statement["recordDetails"]["subject"],
-                            }
-                        )
+                if self._is_first_seen_after(
+                    statement["recordDetails"]["subject"], statement["recordId"]
+                ):
+                    self._additional_check_results.append(
+                        {
+                            "type": "relationship_subject_not_before_relationship_in_dataset",
+                            "statement_type": None,
+                            "statement": statement.get("statementId"),
+                            "subject_id": statement["recordDetails"]["subject"],
+                        }
+                    )
         if (
             "recordId" in statement
             and "recordDetails" in statement
@@ -1059,21 +1124,19 @@ class CheckStatementSerialisation(AdditionalCheck):
             if "interestedParty" in statement["recordDetails"] and isinstance(
                 statement["recordDetails"]["interestedParty"], str
             ):
-                if statement["recordDetails"]["interestedParty"] in self._records:
-                    if (
-                        self._records[statement["recordDetails"]["interestedParty"]]
-                        > self._records[statement["recordId"]]
-                    ):
-                        self._additional_check_results.append(
-                            {
-                                "type": "relationship_interested_party_not_before_relationship_in_dataset",
-                                "statement_type": None,
-                                "statement": statement.get("statementId"),
-                                "interested_party_id": statement["recordDetails"][
-                                    "interestedParty"
-                                ],
-                            }
-                        )
+                if self._is_first_seen_after(
+                    statement["recordDetails"]["interestedParty"], statement["recordId"]
+                ):
+                    self._additional_check_results.append(
+                        {
+                            "type": "relationship_interested_party_not_before_relationship_in_dataset",
+                            "statement_type": None,
+                            "statement": statement.get("statementId"),
+                            "interested_party_id": statement["recordDetails"][
+                                "interestedParty"
+                            ],
+                        }
+                    )
 
 
 class CheckStatementPersonIdentifiersHaveCorrectScheme(AdditionalCheck):
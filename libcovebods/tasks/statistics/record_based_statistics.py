@@ -1,6 +1,11 @@
 from collections import defaultdict
 
 from libcovebods.base_task import AdditionalCheck
+from libcovebods.record_index import (
+    RECORD_TYPE_SEEN_ENTITY,
+    RECORD_TYPE_SEEN_PERSON,
+    RecordColumn,
+)
 
 
 class StatisticsCountEntityRecordStatements(AdditionalCheck):
@@ -108,14 +113,14 @@ class StatisticsCountPersonRecordStatements(AdditionalCheck):
 
 
 class StatisticsCountOwnershipOrControlRecordStatements(AdditionalCheck):
+    uses_record_index = True
+
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
     def __init__(self, lib_cove_bods_config, schema_object):
         super().__init__(lib_cove_bods_config, schema_object)
-        self.entity_record_ids = []
-        self.person_record_ids = []
         self.count_ownership_or_control_statement = 0
         self.count_ownership_or_control_statement_interested_party_with_person = 0
         self.count_ownership_or_control_statement_interested_party_with_entity = 0
@@ -136,14 +141,6 @@ class StatisticsCountOwnershipOrControlRecordStatements(AdditionalCheck):
             defaultdict(int)
         )
 
-    def check_entity_statement_first_pass(self, statement):
-        if "recordId" in statement:
-            self.entity_record_ids.append(statement["recordId"])
-
-    def check_person_statement_first_pass(self, statement):
-        if "recordId" in statement:
-            self.person_record_ids.append(statement["recordId"])
-
     def check_ownership_or_control_statement_first_pass(self, statement):
         try:
             year = int(statement.get("statementDate", "").split("-")[0])
@@ -188,11 +185,18 @@ class StatisticsCountOwnershipOrControlRecordStatements(AdditionalCheck):
         ):
             interested_party = statement["recordDetails"].get("interestedParty")
             if interested_party:
-                if interested_party in self.entity_record_ids:
+                record_number = self._record_index.get_record_number(interested_party)
+                if record_number is None:
+                    record_types_seen = 0
+                else:
+                    record_types_seen = self._record_index.record_types_seen[
+                        record_number
+                    ]
+                if record_types_seen & RECORD_TYPE_SEEN_ENTITY:
                     self.count_ownership_or_control_statement_interested_party_with_entity += (
                         1
                     )
-                if interested_party in self.person_record_ids:
+                if record_types_seen & RECORD_TYPE_SEEN_PERSON:
                     self.count_ownership_or_control_statement_interested_party_with_person += (
                         1
                     )
@@ -220,14 +224,25 @@ class StatisticsCountOwnershipOrControlRecordStatements(AdditionalCheck):
 
 
 class StatisticsStatementsRecordStatus(AdditionalCheck):
+    uses_record_index = True
+
+    # Codes for recordStatus
+    _NO_STATUS = 0
+    _NEW = 1
+    _UPDATED = 2
+    _CLOSED = 3
+    _STATUSES = {"new": _NEW, "updated": _UPDATED, "closed": _CLOSED}
+
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
     def __init__(self, lib_cove_bods_config, schema_object):
         super().__init__(lib_cove_bods_config, schema_object)
-        self.records = {}
-        self.missing_new_records = {}
+        # The status of the last statement for each record
+        self.records = RecordColumn("B")
+        # Records where the first statement with a status was not new
+        self.missing_new_records = RecordColumn("B")
         self.current_records_count = 0
         self.missing_new_records_count = 0
 
@@ -235,21 +250,20 @@ class StatisticsStatementsRecordStatus(AdditionalCheck):
         if (
             isinstance(statement.get("recordStatus"), str)
             and isinstance(statement.get("recordId"), str)
-            and statement.get("recordStatus") in ("new", "updated", "closed")
+            and statement.get("recordStatus") in self._STATUSES
         ):
-            if not statement.get("recordId") in self.records:
-                if not statement.get("recordStatus") == "new":
-                    self.missing_new_records[statement.get("recordId")] = statement.get(
-                        "statementId"
-                    )
-            self.records[statement.get("recordId")] = statement.get("recordStatus")
+            record_number = self._record_index.get_record_number(statement["recordId"])
+            status = self._STATUSES[statement["recordStatus"]]
+            if self.records[record_number] == self._NO_STATUS:
+                if not status == self._NEW:
+                    self.missing_new_records[record_number] = 1
+            self.records[record_number] = status
 
     def final_checks(self):
-        for record_id in self.records:
-            if not self.records[record_id] == "closed":
+        for status in self.records.array:
+            if status != self._NO_STATUS and not status == self._CLOSED:
                 self.current_records_count += 1
-        for record_id in self.missing_new_records:
-            self.missing_new_records_count += 1
+        self.missing_new_records_count = sum(self.missing_new_records.array)
 
     def get_statistics(self):
         data = {
@@ -396,13 +410,15 @@ class StatisticOwnershipOrControlRecordWithAtLeastOneInterestBeneficial(
 
 
 class StatisticDeclarationSubjects(AdditionalCheck):
+    uses_record_index = True
+
     @staticmethod
     def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
         return schema_object.is_schema_version_equal_to_or_greater_than("0.4")
 
     def __init__(self, lib_cove_bods_config, schema_object):
         super().__init__(lib_cove_bods_config, schema_object)
-        self._declaration_subjects = {}
+        self._declaration_subjects = RecordColumn("B")
 
     def check_statement_first_pass(self, statement):
         if (
@@ -410,9 +426,11 @@ class StatisticDeclarationSubjects(AdditionalCheck):
             and "declarationSubject" in statement
             and statement["recordId"] == statement["declarationSubject"]
         ):
-            self._declaration_subjects[statement["recordId"]] = 1
+            record_number = self._record_index.get_record_number(statement["recordId"])
+            if record_number is not None:
+                self._declaration_subjects[record_number] = 1
 
     def get_statistics(self):
         return {
-            "count_declaration_subjects": len(self._declaration_subjects),
+            "count_declaration_subjects": sum(self._declaration_subjects.array),
         }
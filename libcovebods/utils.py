@@ -40,6 +40,50 @@ def get_statement_type(statement, schema_object):
         return statement.get("statementType")
 
 
+# Codes for the types of statement that tasks have hooks for, as returned by get_statement_type_classifier()
+STATEMENT_TYPE_CODE_OTHER = 0
+STATEMENT_TYPE_CODE_ENTITY = 1
+STATEMENT_TYPE_CODE_PERSON = 2
+STATEMENT_TYPE_CODE_OWNERSHIP_OR_CONTROL = 3
+
+_STATEMENT_TYPE_CODES = {
+    "entityStatement": STATEMENT_TYPE_CODE_ENTITY,
+    "personStatement": STATEMENT_TYPE_CODE_PERSON,
+    "ownershipOrControlStatement": STATEMENT_TYPE_CODE_OWNERSHIP_OR_CONTROL,
+}
+
+_RECORD_TYPE_CODES = {
+    "entity": STATEMENT_TYPE_CODE_ENTITY,
+    "person": STATEMENT_TYPE_CODE_PERSON,
+    "relationship": STATEMENT_TYPE_CODE_OWNERSHIP_OR_CONTROL,
+}
+
+
+def _classify_by_statement_type(statement):
+    statement_type = statement.get("statementType")
+    if isinstance(statement_type, str):
+        return _STATEMENT_TYPE_CODES.get(statement_type, STATEMENT_TYPE_CODE_OTHER)
+    return STATEMENT_TYPE_CODE_OTHER
+
+
+def _classify_by_record_type(statement):
+    record_type = statement.get("recordType")
+    if isinstance(record_type, str):
+        return _RECORD_TYPE_CODES.get(record_type, STATEMENT_TYPE_CODE_OTHER)
+    return STATEMENT_TYPE_CODE_OTHER
+
+
+def get_statement_type_classifier(schema_object):
+    """Returns a function that takes a statement and returns one of the STATEMENT_TYPE_CODE_* constants.
+
+    This gives the same answers as get_statement_type(), but the schema version is only looked at once,
+    here, instead of for every statement."""
+    if schema_object.is_schema_version_equal_to_or_greater_than("0.4"):
+        return _classify_by_record_type
+    else:
+        return _classify_by_statement_type
+
+
 def parse_date_field(date_str):
     if not isinstance(date_str, str):
         return None
@@ -25,7 +25,11 @@ setup(
         "jsonpointer",
         "pycountry",
     ],
-    extras_require={"dev": ["pytest", "flake8", "black==22.3.0", "isort", "mypy"]},
+    extras_require={
+        "dev": ["pytest", "flake8", "black==22.3.0", "isort", "mypy"],
+        # Optional faster JSON parsing; see libcovebods.json_backends
+        "orjson": ["orjson"],
+    },
     classifiers=[
         "License :: OSI Approved :: GNU Affero General Public License v3 or later (AGPLv3+)",
     ],
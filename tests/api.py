@@ -13,6 +13,7 @@ def bods_json_output(
     json_data=None,
     lib_cove_bods_config=None,
     sample_mode=False,
+    full_file_counts=False,
 ):
     # Data Reader
     data_reader = libcovebods.data_reader.DataReader(
@@ -26,7 +27,7 @@ def bods_json_output(
 
     # Additional checks and stats
     output_data = libcovebods.run_tasks.process_additional_checks(
-        data_reader, lib_cove_bods_config, schema
+        data_reader, lib_cove_bods_config, schema, full_file_counts=full_file_counts
     )
 
     # Additional fields
@@ -40,7 +41,7 @@ def bods_json_output(
     jsonschemavalidate_output = jsonschemavalidate_validator.validate(data_reader)
 
     # Put it all together ...
-    return {
+    output = {
         "schema_version": schema.schema_version,
         "additional_checks": output_data["additional_checks"],
         "additional_checks_count": len(output_data["additional_checks"]),
@@ -51,3 +52,6 @@ def bods_json_output(
         "additional_fields": additionalfields_output,
         "file_type": "json",
     }
+    if full_file_counts:
+        output["full_file_counts"] = output_data["full_file_counts"]
+    return output
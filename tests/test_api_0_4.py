@@ -143,3 +143,20 @@ def test_basic_with_operating_mic_code_missing_1():
         results["additional_checks"][0]["statement"]
         == "2f7bf9370f1254068e5e946df067d07d"
     )
+
+
+def test_basic_json_lines_1():
+
+    cove_temp_folder = tempfile.mkdtemp(
+        prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()
+    )
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.jsonl"
+    )
+
+    results = bods_json_output(cove_temp_folder, json_filename)
+
+    assert results["schema_version"] == "0.4"
+    assert results["validation_errors_count"] == 0
+    assert results["additional_fields_count"] == 0
+    assert results["additional_checks_count"] == 0
@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+
+import pytest
+
+import libcovebods.cli
+
+BAD_LINE_FILENAME = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "fixtures",
+    "0.4",
+    "basic_1_with_bad_line.jsonl",
+)
+
+
+@pytest.mark.parametrize("command", ["pv", "af", "jsv"])
+def test_json_lines_bad_line(command, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["libcovebods", command, BAD_LINE_FILENAME])
+
+    with pytest.raises(SystemExit) as exit_info:
+        libcovebods.cli.main()
+
+    assert exit_info.value.code == 1
+    captured = capsys.readouterr()
+    # The output is still printed, and the bad line is reported separately
+    json.loads(captured.out)
+    assert captured.err.startswith("Line 2 could not be parsed: ")
+
+
+def test_json_lines_good(monkeypatch, capsys):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["libcovebods", "jsv", BAD_LINE_FILENAME.replace("_with_bad_line", "")],
+    )
+
+    libcovebods.cli.main()
+
+    captured = capsys.readouterr()
+    assert json.loads(captured.out) == []
+    assert captured.err == ""
@@ -0,0 +1,123 @@
+import copy
+import glob
+import json
+import os
+import pickle
+import sys
+
+import pytest
+
+import libcovebods.additionalfields
+import libcovebods.config
+import libcovebods.data_reader
+import libcovebods.jsonschemavalidate
+import libcovebods.run_tasks
+import libcovebods.schema
+from libcovebods.compact_statements import (
+    ReadOnlyDict,
+    ReadOnlyList,
+    compact_statement,
+)
+
+FIXTURES_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "fixtures"
+)
+
+
+def test_compact_statement_1():
+
+    statements = [
+        json.loads(
+            '{"recordType": "entity", "recordDetails": {"identifiers": [{"scheme": "GB-COH", "id": "1"}]}}'
+        )
+        for _ in range(2)
+    ]
+
+    compacted = [compact_statement(statement) for statement in statements]
+
+    assert statements == compacted
+    # Keys and some values are shared between statements
+    keys = [list(statement.keys())[0] for statement in compacted]
+    assert keys[0] is keys[1]
+    assert compacted[0]["recordType"] is compacted[1]["recordType"]
+    assert (
+        compacted[0]["recordDetails"]["identifiers"][0]["scheme"]
+        is compacted[1]["recordDetails"]["identifiers"][0]["scheme"]
+    )
+
+
+@pytest.mark.parametrize("freeze", [False, True])
+@pytest.mark.parametrize("length", [1, 9])
+def test_compact_statement_list_sizes_1(freeze, length):
+
+    statement = json.loads(json.dumps({"interests": [{"type": "x"}] * length}))
+    list_type = ReadOnlyList if freeze else list
+
+    compacted = compact_statement(statement, freeze=freeze)
+
+    # The parser leaves room for more items; the copy doesn't
+    assert sys.getsizeof(statement["interests"]) > sys.getsizeof([None] * length)
+    assert sys.getsizeof(compacted["interests"]) == sys.getsizeof(
+        list_type([None] * length)
+    )
+
+
+def test_freeze_statement_1():
+
+    statement = compact_statement(
+        {"recordType": "entity", "recordDetails": {"identifiers": [{"id": "1"}]}},
+        freeze=True,
+    )
+
+    assert isinstance(statement, dict)
+    assert isinstance(statement["recordDetails"]["identifiers"], list)
+    with pytest.raises(TypeError):
+        statement["recordType"] = "person"
+    with pytest.raises(TypeError):
+        statement["recordDetails"].pop("identifiers")
+    with pytest.raises(TypeError):
+        statement["recordDetails"]["identifiers"].append({})
+
+    # Can still be copied, pickled and serialised
+    assert statement == copy.deepcopy(statement)
+    assert isinstance(pickle.loads(pickle.dumps(statement)), ReadOnlyDict)
+    assert isinstance(
+        pickle.loads(pickle.dumps(statement))["recordDetails"]["identifiers"],
+        ReadOnlyList,
+    )
+    assert json.loads(json.dumps(statement)) == statement
+
+
+def _review(data_reader):
+    config = libcovebods.config.LibCoveBODSConfig()
+    schema = libcovebods.schema.SchemaBODS(data_reader, config)
+    output = libcovebods.run_tasks.process_additional_checks(
+        data_reader, config, schema
+    )
+    validation_errors = libcovebods.jsonschemavalidate.JSONSchemaValidator(
+        schema
+    ).validate(data_reader)
+    return {
+        "schema_version": schema.schema_version,
+        "additional_checks": output["additional_checks"],
+        "statistics": output["statistics"],
+        "validation_errors": [o.json() for o in validation_errors],
+        "additional_fields": libcovebods.additionalfields.AdditionalFields(
+            schema
+        ).process(data_reader),
+    }
+
+
+@pytest.mark.parametrize(
+    "json_filename", sorted(glob.glob(os.path.join(FIXTURES_DIRECTORY, "*", "*.json")))
+)
+def test_freeze_statements_review_is_the_same(json_filename):
+
+    expected = _review(libcovebods.data_reader.DataReader(json_filename))
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, freeze_statements=True
+    )
+
+    # If any code tried to change a statement, this would raise TypeError
+    assert expected == _review(data_reader)
@@ -1,7 +1,20 @@
+import bz2
+import gc
+import gzip
+import io
 import json
+import lzma
 import os
+import tempfile
 
+import pytest
+
+import libcovebods.additionalfields
+import libcovebods.config
 import libcovebods.data_reader
+import libcovebods.jsonschemavalidate
+import libcovebods.run_tasks
+import libcovebods.schema
 
 
 def test_full_get_all_data_1():
@@ -109,3 +122,621 @@ def test_sample_bad_statements_are_included_get_all_data_1():
 
     # In this case the input file has way less than 50 of each type, so we expect exactly the same
     assert expected == actual
+
+
+def test_full_get_all_data_is_parsed_once_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    first = data_reader.get_all_data()
+    second = data_reader.get_all_data()
+
+    assert first is second
+    assert data_reader.parse_count == 1
+
+    data_reader.release()
+    third = data_reader.get_all_data()
+
+    assert third is not first
+    assert third == first
+    assert data_reader.parse_count == 2
+
+
+def test_sample_get_all_data_is_parsed_once_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.1",
+        "basic_extra_ownership_or_control_statements_1.json",
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, sample_mode=True, sample_mode_max_row_count_per_statement_type=1
+    )
+    data_reader.get_all_data()
+    data_reader.get_all_data()
+
+    assert data_reader.parse_count == 1
+
+
+def test_whole_review_parses_once_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    config = libcovebods.config.LibCoveBODSConfig()
+    schema = libcovebods.schema.SchemaBODS(data_reader, config)
+    libcovebods.run_tasks.process_additional_checks(data_reader, config, schema)
+    libcovebods.additionalfields.AdditionalFields(schema).process(data_reader)
+    libcovebods.jsonschemavalidate.JSONSchemaValidator(schema).validate(data_reader)
+
+    assert data_reader.parse_count == 1
+
+
+def test_streaming_get_iterator_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename, streaming_mode=True)
+
+    assert expected == list(data_reader.get_iterator())
+    assert expected == list(data_reader.get_iterator())
+    assert data_reader.parse_count == 2
+
+
+def test_streaming_get_iterator_dict_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        "invalid-schema",
+        "statements_not_array.json",
+    )
+
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename, streaming_mode=True)
+
+    assert [expected] == list(data_reader.get_iterator())
+
+
+def test_streaming_process_additional_checks_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        "sample_300_statements.json",
+    )
+
+    config = libcovebods.config.LibCoveBODSConfig()
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    schema = libcovebods.schema.SchemaBODS(data_reader, config)
+    expected = libcovebods.run_tasks.process_additional_checks(
+        data_reader, config, schema
+    )
+
+    streaming_data_reader = libcovebods.data_reader.DataReader(
+        json_filename, streaming_mode=True
+    )
+    actual = libcovebods.run_tasks.process_additional_checks(
+        streaming_data_reader, config, schema
+    )
+
+    assert expected["additional_checks"] == actual["additional_checks"]
+    assert expected["statistics"] == actual["statistics"]
+    # One parse for each pass, and the data is never held
+    assert streaming_data_reader.parse_count == 2
+    assert not streaming_data_reader._all_data_loaded
+
+
+def test_json_lines_get_all_data_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    json_lines_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.jsonl"
+    )
+
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(json_lines_filename)
+
+    assert data_reader.get_input_format() == "jsonl"
+    assert expected == data_reader.get_all_data()
+    assert [] == data_reader.get_parse_errors()
+
+
+def test_json_lines_streaming_and_sample_1():
+
+    json_lines_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.jsonl"
+    )
+
+    with open(json_lines_filename) as fp:
+        expected = [json.loads(line) for line in fp]
+
+    streaming_data_reader = libcovebods.data_reader.DataReader(
+        json_lines_filename, streaming_mode=True
+    )
+    assert expected == list(streaming_data_reader.get_iterator())
+
+    sample_data_reader = libcovebods.data_reader.DataReader(
+        json_lines_filename,
+        sample_mode=True,
+        sample_mode_max_row_count_per_statement_type=1,
+    )
+    assert expected == sample_data_reader.get_all_data()
+
+
+@pytest.mark.parametrize(
+    "fixture_name,bad_line",
+    [
+        ("basic_1_with_bad_line.jsonl", 2),
+        ("basic_1_with_bad_first_line.jsonl", 1),
+    ],
+)
+def test_json_lines_bad_line_1(fixture_name, bad_line):
+
+    json_lines_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        fixture_name,
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_lines_filename)
+    actual = data_reader.get_all_data()
+
+    assert libcovebods.data_reader.INPUT_FORMAT_JSON_LINES == (
+        data_reader.get_input_format()
+    )
+    assert 3 == len(actual)
+    assert 1 == len(data_reader.get_parse_errors())
+    assert bad_line == data_reader.get_parse_errors()[0]["line"]
+    assert data_reader.get_parse_errors() == data_reader.get_metadata()["parse_errors"]
+
+    config = libcovebods.config.LibCoveBODSConfig()
+    schema = libcovebods.schema.SchemaBODS(data_reader, config)
+    output = libcovebods.run_tasks.process_additional_checks(
+        data_reader, config, schema
+    )
+    assert bad_line == output["metadata"]["parse_errors"][0]["line"]
+
+
+def test_json_not_detected_as_json_lines_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        "invalid-schema",
+        "statements_not_array.json",
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+
+    assert data_reader.get_input_format() == "json"
+    assert isinstance(data_reader.get_all_data(), dict)
+
+
+@pytest.mark.parametrize(
+    "compression,opener",
+    [("gzip", gzip.open), ("bz2", bz2.open), ("xz", lzma.open)],
+)
+@pytest.mark.parametrize("fixture_name", ["basic_1.json", "basic_1.jsonl"])
+def test_compressed_1(compression, opener, fixture_name):
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    input_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", fixture_name
+    )
+    compressed_filename = os.path.join(
+        tempfile.mkdtemp(prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()),
+        fixture_name + "." + compression,
+    )
+    with open(input_filename, "rb") as fp_in:
+        with opener(compressed_filename, "wb") as fp_out:
+            fp_out.write(fp_in.read())
+
+    data_reader = libcovebods.data_reader.DataReader(compressed_filename)
+    assert data_reader.get_compression() == compression
+    assert expected == data_reader.get_all_data()
+
+    streaming_data_reader = libcovebods.data_reader.DataReader(
+        compressed_filename, streaming_mode=True
+    )
+    assert expected == list(streaming_data_reader.get_iterator())
+
+    sample_data_reader = libcovebods.data_reader.DataReader(
+        compressed_filename, sample_mode=True
+    )
+    assert expected == sample_data_reader.get_all_data()
+
+
+def test_not_compressed_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+
+    assert data_reader.get_compression() is None
+
+
+@pytest.mark.parametrize("fixture_name", ["basic_1.json", "basic_1.jsonl"])
+def test_mmap_1(fixture_name):
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    input_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", fixture_name
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(input_filename, use_mmap=True)
+    assert expected == data_reader.get_all_data()
+    assert data_reader.get_metadata()["mmap"]
+
+    streaming_data_reader = libcovebods.data_reader.DataReader(
+        input_filename, streaming_mode=True, use_mmap=True
+    )
+    assert expected == list(streaming_data_reader.get_iterator())
+
+    sample_data_reader = libcovebods.data_reader.DataReader(
+        input_filename, sample_mode=True, use_mmap=True
+    )
+    assert expected == sample_data_reader.get_all_data()
+
+
+def test_ijson_backend_reported_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    data_reader.get_all_data()
+    # Full mode does not use ijson
+    assert data_reader.get_metadata()["ijson_backend"] is None
+
+    sample_data_reader = libcovebods.data_reader.DataReader(
+        json_filename, sample_mode=True, ijson_backend="python"
+    )
+    sample_data_reader.get_all_data()
+    assert sample_data_reader.get_metadata()["ijson_backend"] == "python"
+
+
+@pytest.mark.parametrize("fixture_name", ["basic_1.json", "basic_1.jsonl"])
+def test_peek_first_statement_1(fixture_name):
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    input_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", fixture_name
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(input_filename)
+
+    assert (
+        libcovebods.data_reader.TOP_LEVEL_TYPE_ARRAY == data_reader.get_top_level_type()
+    )
+    assert expected[0] == data_reader.peek_first_statement()
+    # Peeking is not a full parse
+    assert 0 == data_reader.parse_count
+
+
+def test_peek_first_statement_not_array_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        "invalid-schema",
+        "statements_not_array.json",
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+
+    assert (
+        libcovebods.data_reader.TOP_LEVEL_TYPE_OBJECT
+        == data_reader.get_top_level_type()
+    )
+    assert data_reader.peek_first_statement() is None
+
+
+def test_schema_version_detection_does_not_parse_whole_file_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    schema = libcovebods.schema.SchemaBODS(data_reader)
+
+    assert "0.4" == schema.schema_version
+    assert 0 == data_reader.parse_count
+
+
+def test_streaming_big_integer_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        "invalid-schema",
+        "statement_statementId_not_string.json",
+    )
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename, streaming_mode=True)
+
+    assert expected == list(data_reader.get_iterator())
+    assert expected[0] == data_reader.peek_first_statement()
+
+
+def _write_many_statements(extension, statement_count_per_type=40):
+    """Writes a file with lots of statements, numbered in the order they are in the file."""
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    with open(json_filename) as fp:
+        basic_statements = json.load(fp)
+    statements = []
+    for i in range(statement_count_per_type):
+        for statement in basic_statements:
+            statements.append(
+                dict(statement, statementId="statement-%d" % len(statements))
+            )
+    filename = os.path.join(
+        tempfile.mkdtemp(prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()),
+        "many" + extension,
+    )
+    with open(filename, "w") as fp:
+        if extension == ".jsonl":
+            for statement in statements:
+                fp.write(json.dumps(statement) + "\n")
+        else:
+            json.dump(statements, fp, indent=4)
+    return filename, statements
+
+
+def test_sample_reservoir_1():
+
+    filename, statements = _write_many_statements(".json")
+
+    data_reader = libcovebods.data_reader.DataReader(
+        filename,
+        sample_mode=True,
+        sample_mode_max_row_count_per_statement_type=5,
+        sample_mode_method=libcovebods.data_reader.SAMPLE_MODE_METHOD_RESERVOIR,
+        sample_mode_seed=42,
+    )
+    sample_data = data_reader.get_all_data()
+
+    # 5 of each type
+    assert 15 == len(sample_data)
+    for record_type in ["entity", "person", "relationship"]:
+        assert 5 == len([s for s in sample_data if s["recordType"] == record_type])
+    # Not just the first ones, and in file order
+    positions = [int(s["statementId"].split("-")[1]) for s in sample_data]
+    assert positions != list(range(15))
+    assert positions == sorted(positions)
+    assert [statements[p] for p in positions] == sample_data
+
+    # The same seed gives the same sample
+    data_reader_again = libcovebods.data_reader.DataReader(
+        filename,
+        sample_mode=True,
+        sample_mode_max_row_count_per_statement_type=5,
+        sample_mode_method=libcovebods.data_reader.SAMPLE_MODE_METHOD_RESERVOIR,
+        sample_mode_seed=42,
+    )
+    assert sample_data == data_reader_again.get_all_data()
+    assert sample_data[0] == data_reader_again.peek_first_statement()
+
+
+def test_sample_reservoir_small_file_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename,
+        sample_mode=True,
+        sample_mode_method=libcovebods.data_reader.SAMPLE_MODE_METHOD_RESERVOIR,
+    )
+
+    assert expected == data_reader.get_all_data()
+
+
+@pytest.mark.parametrize("extension", [".json", ".jsonl"])
+@pytest.mark.parametrize("use_statement_index", [False, True])
+def test_sample_jump_1(extension, use_statement_index):
+
+    filename, statements = _write_many_statements(extension)
+
+    if use_statement_index:
+        libcovebods.data_reader.DataReader(
+            filename, use_statement_index=True, save_statement_index=True
+        ).get_statement_offsets()
+
+    data_reader = libcovebods.data_reader.DataReader(
+        filename,
+        sample_mode=True,
+        sample_mode_max_row_count_per_statement_type=5,
+        sample_mode_method=libcovebods.data_reader.SAMPLE_MODE_METHOD_JUMP,
+        sample_mode_seed=42,
+        use_statement_index=use_statement_index,
+    )
+    sample_data = data_reader.get_all_data()
+
+    assert 0 < len(sample_data) <= 15
+    for record_type in ["entity", "person", "relationship"]:
+        assert 5 >= len([s for s in sample_data if s["recordType"] == record_type])
+    # Every statement is a whole statement from the file, with no repeats, in file order
+    positions = [int(s["statementId"].split("-")[1]) for s in sample_data]
+    assert positions == sorted(set(positions))
+    assert [statements[p] for p in positions] == sample_data
+    assert "jump" == data_reader.get_metadata()["sample_mode_method"]
+
+
+def test_sample_jump_compressed_1():
+
+    filename, statements = _write_many_statements(".json", 3)
+    with open(filename, "rb") as fp_in, gzip.open(filename + ".gz", "wb") as fp_out:
+        fp_out.write(fp_in.read())
+
+    data_reader = libcovebods.data_reader.DataReader(
+        filename + ".gz",
+        sample_mode=True,
+        sample_mode_method=libcovebods.data_reader.SAMPLE_MODE_METHOD_JUMP,
+    )
+
+    # Falls back to a reservoir sample, which for a small file is everything
+    assert statements == data_reader.get_all_data()
+
+
+def test_full_file_counts_reuses_full_mode_data_1():
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    data_reader.get_all_data()
+    counts = data_reader.get_full_file_counts()
+
+    assert 3 == counts["count_statements"]
+    assert 1 == data_reader.parse_count
+
+
+@pytest.mark.parametrize(
+    "fixture_name,make_source",
+    [
+        ("basic_1.json", lambda data: data),
+        ("basic_1.json", bytearray),
+        ("basic_1.json", memoryview),
+        ("basic_1.json", io.BytesIO),
+        ("basic_1.json", lambda data: io.StringIO(data.decode("utf-8"))),
+        ("basic_1.json", gzip.compress),
+        ("basic_1.json", json.loads),
+        ("basic_1.jsonl", lambda data: data),
+        ("basic_1.jsonl", io.BytesIO),
+    ],
+)
+def test_in_memory_input_1(fixture_name, make_source):
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    input_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", fixture_name
+    )
+    with open(input_filename, "rb") as fp:
+        data = fp.read()
+
+    data_reader = libcovebods.data_reader.DataReader(make_source(data))
+    assert expected == data_reader.get_all_data()
+    assert expected[0] == data_reader.peek_first_statement()
+
+    streaming_data_reader = libcovebods.data_reader.DataReader(
+        make_source(data), streaming_mode=True, use_statement_index=True
+    )
+    assert expected == list(streaming_data_reader.get_iterator())
+    assert expected == list(streaming_data_reader.get_iterator())
+
+    sample_data_reader = libcovebods.data_reader.DataReader(
+        make_source(data), sample_mode=True
+    )
+    assert expected == sample_data_reader.get_all_data()
+
+    schema = libcovebods.schema.SchemaBODS(
+        libcovebods.data_reader.DataReader(make_source(data))
+    )
+    assert "0.4" == schema.schema_version
+
+
+@pytest.mark.parametrize("streaming_mode", [False, True])
+def test_intern_strings_1(streaming_mode):
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        "sample_300_statements.json",
+    )
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, streaming_mode=streaming_mode, intern_strings=True
+    )
+    statements = list(data_reader.get_iterator())
+
+    assert expected == statements
+    assert statements[0]["recordStatus"] is statements[-1]["recordStatus"]
+    assert [k for k in statements[0] if k == "recordId"][0] is [
+        k for k in statements[-1] if k == "recordId"
+    ][0]
+
+
+@pytest.mark.parametrize("pause_gc", [False, True])
+def test_pause_gc_1(pause_gc):
+
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "fixtures", "0.4", "basic_1.json"
+    )
+    data_reader = libcovebods.data_reader.DataReader(json_filename, pause_gc=pause_gc)
+    json_backend = data_reader._json_backend
+    gc_enabled_while_parsing = []
+
+    class RecordingJSONBackend:
+        name = json_backend.name
+
+        def loads(self, data):
+            gc_enabled_while_parsing.append(gc.isenabled())
+            return json_backend.loads(data)
+
+    data_reader._json_backend = RecordingJSONBackend()
+
+    data_reader.get_all_data()
+
+    assert [not pause_gc] == gc_enabled_while_parsing
+    assert gc.isenabled()
@@ -0,0 +1,138 @@
+import os
+
+import libcovebods.config
+import libcovebods.data_reader
+import libcovebods.run_tasks
+import libcovebods.schema
+from libcovebods.base_task import AdditionalCheck
+from libcovebods.execution_plan import get_execution_plan
+
+
+class FirstPassOnly(AdditionalCheck):
+    def __init__(self, lib_cove_bods_config, schema_object):
+        super().__init__(lib_cove_bods_config, schema_object)
+        self.count = 0
+
+    def check_entity_statement_first_pass(self, statement):
+        self.count += 1
+
+    def get_statistics(self):
+        return {"count_first_pass_entities": self.count}
+
+
+class SecondPassToo(FirstPassOnly):
+    def check_statement_second_pass(self, statement):
+        self.count += 1
+
+
+class NotFor04(AdditionalCheck):
+    @staticmethod
+    def does_apply_to_schema(lib_cove_bods_config, schema_object) -> bool:
+        return schema_object.is_schema_version_less_than("0.3")
+
+
+class CountingDataReader(libcovebods.data_reader.DataReader):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.iterator_count = 0
+
+    def get_iterator(self):
+        self.iterator_count += 1
+        return super().get_iterator()
+
+
+def _get_data_reader():
+    return CountingDataReader(
+        os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            "fixtures",
+            "0.4",
+            "basic_1.json",
+        )
+    )
+
+
+def test_execution_plan_hooks():
+
+    config = libcovebods.config.LibCoveBODSConfig()
+    schema = libcovebods.schema.SchemaBODS(_get_data_reader(), config)
+
+    plan = get_execution_plan([FirstPassOnly, SecondPassToo, NotFor04], config, schema)
+
+    assert plan.task_classes == (FirstPassOnly, SecondPassToo)
+    assert plan.hook_task_classes["check_entity_statement_first_pass"] == (
+        FirstPassOnly,
+        SecondPassToo,
+    )
+    assert plan.hook_task_classes["check_statement_first_pass"] == ()
+    assert plan.hook_task_classes["check_statement_second_pass"] == (SecondPassToo,)
+    assert plan.needs_second_pass
+    assert plan.get_hook_counts()["final_checks"] == 0
+
+    # The same plan is used again for the same config, schema version and task classes
+    assert plan is get_execution_plan(
+        [FirstPassOnly, SecondPassToo, NotFor04], config, schema
+    )
+    assert plan is not get_execution_plan([FirstPassOnly], config, schema)
+    assert plan is not get_execution_plan(
+        [FirstPassOnly, SecondPassToo, NotFor04],
+        libcovebods.config.LibCoveBODSConfig(),
+        schema,
+    )
+
+
+def test_second_pass_skipped_if_not_needed():
+
+    config = libcovebods.config.LibCoveBODSConfig()
+    data_reader = _get_data_reader()
+    schema = libcovebods.schema.SchemaBODS(data_reader, config)
+
+    output = libcovebods.run_tasks.process_additional_checks(
+        data_reader, config, schema, task_classes=[FirstPassOnly]
+    )
+
+    assert output["statistics"] == {"count_first_pass_entities": 1}
+    assert data_reader.iterator_count == 1
+
+
+def test_second_pass_run_if_needed():
+
+    config = libcovebods.config.LibCoveBODSConfig()
+    data_reader = _get_data_reader()
+    schema = libcovebods.schema.SchemaBODS(data_reader, config)
+
+    output = libcovebods.run_tasks.process_additional_checks(
+        data_reader, config, schema, task_classes=[SecondPassToo]
+    )
+
+    # 1 entity statement in the first pass, and all 3 statements in the second pass
+    assert output["statistics"] == {"count_first_pass_entities": 4}
+    assert data_reader.iterator_count == 2
+
+
+class UsesRecordIndex(AdditionalCheck):
+    uses_record_index = True
+
+    def check_statement_second_pass(self, statement):
+        self.record_count = len(self._record_index)
+
+    def get_statistics(self):
+        return {"record_count": self.record_count}
+
+
+def test_record_index_given_to_tasks_that_use_it():
+
+    config = libcovebods.config.LibCoveBODSConfig()
+    data_reader = _get_data_reader()
+    schema = libcovebods.schema.SchemaBODS(data_reader, config)
+
+    assert not get_execution_plan([FirstPassOnly], config, schema).needs_record_index
+    assert get_execution_plan(
+        [FirstPassOnly, UsesRecordIndex], config, schema
+    ).needs_record_index
+
+    output = libcovebods.run_tasks.process_additional_checks(
+        data_reader, config, schema, task_classes=[FirstPassOnly, UsesRecordIndex]
+    )
+
+    assert output["statistics"] == {"count_first_pass_entities": 1, "record_count": 3}
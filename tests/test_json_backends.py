@@ -0,0 +1,115 @@
+import glob
+import json
+import os
+from decimal import Decimal
+
+import pytest
+
+import libcovebods.data_reader
+import libcovebods.json_backends
+from libcovebods.json_backends import (
+    JSON_BACKEND_JSON,
+    get_available_json_backends,
+    get_json_backend,
+)
+
+FIXTURES_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "fixtures"
+)
+
+FIXTURE_FILENAMES = sorted(
+    glob.glob(os.path.join(FIXTURES_DIRECTORY, "**", "*.json"), recursive=True)
+    + glob.glob(os.path.join(FIXTURES_DIRECTORY, "**", "*.jsonl"), recursive=True)
+)
+
+
+def _with_types(value):
+    """So that 1 and 1.0 (and True) are not treated as the same when comparing."""
+    if isinstance(value, dict):
+        return {k: _with_types(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_with_types(v) for v in value]
+    return (type(value).__name__, value)
+
+
+@pytest.mark.parametrize("json_backend", get_available_json_backends())
+@pytest.mark.parametrize("json_filename", FIXTURE_FILENAMES)
+def test_json_backends_give_same_results(json_backend, json_filename):
+
+    expected = _with_types(
+        libcovebods.data_reader.DataReader(
+            json_filename, json_backend=JSON_BACKEND_JSON
+        ).get_all_data()
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, json_backend=json_backend
+    )
+    assert expected == _with_types(data_reader.get_all_data())
+
+    indexed_data_reader = libcovebods.data_reader.DataReader(
+        json_filename,
+        json_backend=json_backend,
+        streaming_mode=True,
+        use_statement_index=True,
+    )
+    list(indexed_data_reader.get_iterator())
+    # The second time uses the statement index, and so the backend
+    assert _with_types(list(data_reader.get_iterator())) == _with_types(
+        list(indexed_data_reader.get_iterator())
+    )
+
+
+@pytest.mark.parametrize("json_backend", get_available_json_backends())
+@pytest.mark.parametrize(
+    "data",
+    [
+        b'[{"a": 123456789012345678901234567890}]',
+        b'[{"a": -9223372036854775809}]',
+        b'[{"a": 18446744073709551615}]',
+        b'[{"a": 1e400, "b": NaN, "c": -Infinity}]',
+        b'\xef\xbb\xbf[{"a": 1}]',
+        b'[{"a": "\\ud800"}]',
+        b'[{"a": 1, "a": 2.5, "b": -0.0, "c": 1E5}]',
+    ],
+)
+def test_json_backends_give_same_results_edge_cases(json_backend, data):
+
+    backend = get_json_backend(json_backend)
+    expected = json.loads(data)
+
+    assert repr(_with_types(expected)) == repr(_with_types(backend.loads(data)))
+    assert _with_types(json.loads(data, parse_float=Decimal)) == _with_types(
+        backend.loads(data, use_decimal=True)
+    )
+
+
+@pytest.mark.parametrize("json_backend", get_available_json_backends())
+def test_json_backends_give_same_errors(json_backend):
+
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(b'[{"a": 1},, ]')
+
+    with pytest.raises(json.JSONDecodeError) as actual:
+        get_json_backend(json_backend).loads(b'[{"a": 1},, ]')
+
+    assert str(expected.value) == str(actual.value)
+
+
+def test_json_backend_not_available():
+
+    with pytest.raises(ValueError):
+        get_json_backend("not-a-json-backend")
+
+
+@pytest.mark.parametrize("digit_count", [18, 19, 40])
+@pytest.mark.parametrize("start", range(0, 30))
+def test_may_have_big_integers_across_chunks(digit_count, start, monkeypatch):
+
+    monkeypatch.setattr(libcovebods.json_backends, "_SCAN_CHUNK_SIZE", 16)
+    data = b" " * start + b"1" * digit_count + b" " * 10
+
+    assert libcovebods.json_backends._may_have_big_integers(data) == (digit_count >= 19)
+    assert libcovebods.json_backends._may_have_big_integers(
+        bytearray(data)
+    ) == libcovebods.json_backends._may_have_big_integers(data.decode())
@@ -0,0 +1,340 @@
+import json
+import os
+import pathlib
+import tempfile
+
+import pytest
+from jsonschema import FormatChecker
+from jsonschema.validators import Draft4Validator, Draft202012Validator, extend
+
+import libcovebods.config
+import libcovebods.data_reader
+import libcovebods.jsonschemavalidate
+import libcovebods.schema
+from libcovebods.schema_dir import (
+    clear_schema_cache,
+    get_schema_file_data,
+    schema_registry,
+)
+
+FIXTURES_DIR = pathlib.Path(os.path.dirname(os.path.realpath(__file__))) / "fixtures"
+
+
+def _validate_whole_data(json_filename):
+    """Validates all the data in one go, as validate() used to."""
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    schema = libcovebods.schema.SchemaBODS(
+        data_reader, libcovebods.config.LibCoveBODSConfig()
+    )
+    validator = libcovebods.jsonschemavalidate.JSONSchemaValidator(schema)
+    all_data = data_reader.get_all_data()
+    return [
+        libcovebods.jsonschemavalidate.BODSValidationError(e, all_data, schema).json()
+        for e in validator._get_validator().iter_errors(all_data)
+    ]
+
+
+def _validate(json_filename, **kwargs):
+    data_reader = libcovebods.data_reader.DataReader(json_filename, **kwargs)
+    schema = libcovebods.schema.SchemaBODS(
+        data_reader, libcovebods.config.LibCoveBODSConfig()
+    )
+    validator = libcovebods.jsonschemavalidate.JSONSchemaValidator(schema)
+    return [error.json() for error in validator.validate(data_reader)]
+
+
+def _get_fixtures():
+    for json_filename in sorted(FIXTURES_DIR.glob("**/*.json")):
+        try:
+            with open(json_filename) as fp:
+                json.load(fp)
+        except ValueError:
+            continue
+        yield str(json_filename.relative_to(FIXTURES_DIR))
+
+
+@pytest.mark.parametrize("fixture", list(_get_fixtures()))
+def test_validate_one_statement_at_a_time_matches_whole_data(fixture):
+    json_filename = str(FIXTURES_DIR / fixture)
+
+    expected = _validate_whole_data(json_filename)
+
+    assert _validate(json_filename) == expected
+    assert _validate(json_filename, streaming_mode=True) == expected
+
+
+def test_validate_not_a_list():
+    json_filename = os.path.join(
+        tempfile.mkdtemp(prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()),
+        "object.json",
+    )
+    with open(json_filename, "w") as fp:
+        json.dump({"statementId": "1", "recordType": "entity"}, fp)
+
+    errors = _validate(json_filename)
+
+    assert errors == _validate_whole_data(json_filename)
+    assert [error["validator"] for error in errors] == ["type"]
+    assert errors[0]["path"] == []
+
+
+def _write_all_fixtures_as_one_file(schema_version):
+    """Puts the statements from every fixture for a schema version in one list, to get lots of errors."""
+    all_data = []
+    for fixture in _get_fixtures():
+        if fixture.startswith(schema_version + "/"):
+            with open(FIXTURES_DIR / fixture) as fp:
+                data = json.load(fp)
+            if isinstance(data, list):
+                all_data.extend(data)
+    # And some that are certainly wrong
+    for statement in all_data[::3]:
+        if isinstance(statement, dict):
+            all_data.append(dict(statement, statementDate=1))
+    json_filename = os.path.join(
+        tempfile.mkdtemp(prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()),
+        "all.json",
+    )
+    with open(json_filename, "w") as fp:
+        json.dump(all_data, fp)
+    return json_filename
+
+
+@pytest.mark.parametrize("schema_version", ["0.2", "0.3", "0.4"])
+def test_validate_jobs(schema_version, monkeypatch):
+    monkeypatch.setattr(libcovebods.jsonschemavalidate, "_VALIDATE_CHUNK_SIZE", 7)
+    json_filename = _write_all_fixtures_as_one_file(schema_version)
+
+    expected = _validate(json_filename)
+
+    assert len(expected) > 10
+    assert _validate_with_jobs(json_filename, 2) == expected
+    assert _validate_with_jobs(json_filename, 3, streaming_mode=True) == expected
+
+
+def test_validate_jobs_without_processes(monkeypatch):
+    def process_pool_executor(*args, **kwargs):
+        raise OSError("No processes here")
+
+    monkeypatch.setattr(
+        libcovebods.jsonschemavalidate.concurrent.futures,
+        "ProcessPoolExecutor",
+        process_pool_executor,
+    )
+    json_filename = _write_all_fixtures_as_one_file("0.4")
+
+    assert _validate_with_jobs(json_filename, 2) == _validate(json_filename)
+
+
+def _validate_with_jobs(json_filename, jobs, **kwargs):
+    data_reader = libcovebods.data_reader.DataReader(json_filename, **kwargs)
+    schema = libcovebods.schema.SchemaBODS(
+        data_reader, libcovebods.config.LibCoveBODSConfig()
+    )
+    validator = libcovebods.jsonschemavalidate.JSONSchemaValidator(schema, jobs=jobs)
+    return [error.json() for error in validator.validate(data_reader)]
+
+
+def _get_statement_variants(statement):
+    """The statement, and copies with every kind of statementType oneOf_draft4 has to deal with."""
+    yield statement
+    if isinstance(statement, dict):
+        yield {k: v for k, v in statement.items() if k != "statementType"}
+        for statement_type in (
+            "entityStatement",
+            "personStatement",
+            "ownershipOrControlStatement",
+            "notAStatementType",
+            "",
+            1,
+            None,
+            ["entityStatement"],
+        ):
+            yield dict(statement, statementType=statement_type)
+
+
+@pytest.mark.parametrize(
+    "fixture",
+    [fixture for fixture in _get_fixtures() if not fixture.startswith("0.4/")],
+)
+def test_oneOf_draft4_matches_exhaustive(fixture):
+    with open(FIXTURES_DIR / fixture) as fp:
+        data = json.load(fp)
+    statements = data if isinstance(data, list) else [data]
+    config = libcovebods.config.LibCoveBODSConfig()
+    for schema_url in (
+        config.config["schema_url"],
+        config.config["schema_versions"]["0.2"]["schema_url"],
+        config.config["schema_versions"]["0.3"]["schema_url"],
+    ):
+        package_schema = get_schema_file_data(schema_url)
+        validator = libcovebods.jsonschemavalidate._make_draft4_validator_class(
+            schema_url
+        )(package_schema)
+        exhaustive_validator = extend(
+            Draft4Validator,
+            {"oneOf": libcovebods.jsonschemavalidate._oneOf_draft4_exhaustive},
+        )(package_schema)
+        for statement in statements:
+            for variant in _get_statement_variants(statement):
+                assert _get_errors(validator, variant) == _get_errors(
+                    exhaustive_validator, variant
+                )
+
+
+@pytest.mark.parametrize("schema_version", ["0.3", "0.4"])
+def test_dispatch_tables_go_with_schema(schema_version):
+    schema_url = libcovebods.config.LibCoveBODSConfig().config["schema_versions"][
+        schema_version
+    ]["schema_url"]
+    validator = libcovebods.jsonschemavalidate._build_validator(
+        schema_version, schema_url
+    )
+
+    assert type(
+        libcovebods.jsonschemavalidate._build_validator(schema_version, schema_url)
+    ) is type(validator)
+
+    clear_schema_cache()
+
+    assert type(
+        libcovebods.jsonschemavalidate._build_validator(schema_version, schema_url)
+    ) is not type(validator)
+
+
+def _get_errors(validator, statement):
+    return [
+        (
+            libcovebods.jsonschemavalidate.BODSValidationError(e, [statement]).json(),
+            [context_error.message for context_error in e.context],
+        )
+        for e in validator.iter_errors([statement])
+    ]
+
+
+def _get_record_variants(statement):
+    """The statement, and copies with every kind of recordType allOf_record_type has to deal with."""
+    yield statement
+    if isinstance(statement, dict):
+        yield {k: v for k, v in statement.items() if k != "recordType"}
+        for record_type in ("entity", "person", "relationship", "notARecordType", 1):
+            yield dict(statement, recordType=record_type)
+        yield dict(statement, recordDetails="notAnObject")
+
+
+@pytest.mark.parametrize(
+    "fixture",
+    [fixture for fixture in _get_fixtures() if fixture.startswith("0.4/")],
+)
+def test_allOf_record_type_matches_generic(fixture):
+    with open(FIXTURES_DIR / fixture) as fp:
+        data = json.load(fp)
+    statements = data if isinstance(data, list) else [data]
+    config = libcovebods.config.LibCoveBODSConfig()
+    schema_url = config.config["schema_versions"]["0.4"]["schema_url"]
+    registry = schema_registry(schema_url)
+    validator = libcovebods.jsonschemavalidate._make_validator_class(schema_url)(
+        registry.contents("urn:statement"),
+        registry=registry,
+        format_checker=FormatChecker(),
+    )
+    generic_validator = Draft202012Validator(
+        registry.contents("urn:statement"),
+        registry=registry,
+        format_checker=FormatChecker(),
+    )
+    for statement in statements:
+        for variant in _get_record_variants(statement):
+            assert _get_errors(validator, variant) == _get_errors(
+                generic_validator, variant
+            )
+
+
+def _get_validator(json_filename, **kwargs):
+    data_reader = libcovebods.data_reader.DataReader(json_filename)
+    schema = libcovebods.schema.SchemaBODS(
+        data_reader, libcovebods.config.LibCoveBODSConfig()
+    )
+    return (
+        data_reader,
+        libcovebods.jsonschemavalidate.JSONSchemaValidator(schema, **kwargs),
+    )
+
+
+def test_validate_max_errors():
+    json_filename = _write_all_fixtures_as_one_file("0.4")
+    all_errors = _validate(json_filename)
+
+    data_reader, validator = _get_validator(json_filename, max_errors=10)
+    errors = [error.json() for error in validator.validate(data_reader)]
+
+    assert errors == all_errors[:10]
+    assert validator.truncated
+
+    data_reader, validator = _get_validator(json_filename, max_errors=len(all_errors))
+    assert len(validator.validate(data_reader)) == len(all_errors)
+    assert not validator.truncated
+
+
+def test_validate_max_errors_stops_early():
+    json_filename = _write_all_fixtures_as_one_file("0.4")
+    data_reader, validator = _get_validator(json_filename, max_errors=1)
+    statements_read = []
+    get_iterator = data_reader.get_iterator
+
+    def counting_get_iterator():
+        for statement in get_iterator():
+            statements_read.append(statement)
+            yield statement
+
+    data_reader.get_iterator = counting_get_iterator
+
+    validator.validate(data_reader)
+
+    assert len(statements_read) < len(data_reader.get_all_data())
+
+
+def test_validate_max_errors_per_group():
+    json_filename = _write_all_fixtures_as_one_file("0.4")
+    all_errors = _validate(json_filename)
+
+    data_reader, validator = _get_validator(json_filename, max_errors_per_group=2)
+    errors = [error.json() for error in validator.validate(data_reader)]
+
+    expected = []
+    group_counts: dict = {}
+    for error in all_errors:
+        group = (error["validator"], error["path_ending"])
+        group_counts[group] = group_counts.get(group, 0) + 1
+        if group_counts[group] <= 2:
+            expected.append(error)
+    assert errors == expected
+    assert len(errors) < len(all_errors)
+    assert validator.truncated
+
+
+def test_summarise():
+    json_filename = _write_all_fixtures_as_one_file("0.4")
+    all_errors = _validate(json_filename)
+
+    data_reader, validator = _get_validator(json_filename)
+    summary = validator.summarise(data_reader, examples_per_group=2)
+
+    assert summary["count"] == len(all_errors)
+    assert not summary["truncated"]
+    assert sum(group["count"] for group in summary["groups"]) == len(all_errors)
+    for group in summary["groups"]:
+        group_errors = [
+            error
+            for error in all_errors
+            if (error["validator"], error["path_ending"])
+            == (group["validator"], group["path_ending"])
+        ]
+        assert group["count"] == len(group_errors)
+        assert group["examples"] == group_errors[:2]
+
+    data_reader, validator = _get_validator(json_filename, max_errors=5)
+    summary = validator.summarise(data_reader)
+
+    assert summary["count"] == 5
+    assert summary["truncated"]
@@ -0,0 +1,120 @@
+from libcovebods.record_index import (
+    RECORD_TYPE_ENTITY,
+    RECORD_TYPE_RELATIONSHIP,
+    RECORD_TYPE_SEEN_ENTITY,
+    RECORD_TYPE_SEEN_OTHER,
+    RECORD_TYPE_SEEN_RELATIONSHIP,
+    RecordColumn,
+    RecordIndex,
+    ValueTable,
+)
+
+STATEMENTS = [
+    {
+        "statementId": "s1",
+        "recordId": "e1",
+        "recordType": "entity",
+        "recordDetails": {"entityType": {"type": "registeredEntity"}},
+    },
+    {
+        "statementId": "s2",
+        "recordId": "p1",
+        "recordType": "person",
+        "recordDetails": {"personType": "knownPerson"},
+    },
+    {"statementId": "s3", "declarationSubject": "e1"},
+    {
+        "statementId": "s4",
+        "recordId": "r1",
+        "recordType": "relationship",
+        "recordDetails": {"componentRecords": ["e1", "e2", {"not": "an id"}]},
+    },
+    {
+        "statementId": "s5",
+        "recordId": "e1",
+        "recordType": "entity",
+        "recordDetails": {"entityType": {"type": "registeredEntity"}},
+    },
+    {"statementId": "s6", "recordId": "r1", "recordType": "weird"},
+    {"statementId": "s7", "recordId": "r1", "recordType": "relationship"},
+]
+
+
+def _get_record_index():
+    record_index = RecordIndex()
+    for statement in STATEMENTS:
+        record_index.add_statement(statement)
+    return record_index
+
+
+def test_record_index_records():
+
+    record_index = _get_record_index()
+
+    # e2 is only mentioned in componentRecords
+    assert record_index.record_numbers == {"e1": 0, "p1": 1, "r1": 2, "e2": 3}
+    assert record_index.record_ids == ["e1", "p1", "r1", "e2"]
+    assert len(record_index) == 4
+    assert record_index.has_record("e1")
+    assert not record_index.has_record("e2")
+    assert not record_index.has_record("nope")
+    assert not record_index.has_record({"not": "an id"})
+    assert record_index.get_record_number(["not", "an", "id"]) is None
+
+
+def test_record_index_positions():
+
+    record_index = _get_record_index()
+
+    assert record_index.first_position.tolist() == [0, 1, 2, -1]
+    assert record_index.last_position.tolist() == [3, 1, 5, -1]
+    assert record_index.component_parent.tolist() == [2, -1, -1, 2]
+
+
+def test_record_index_types():
+
+    record_index = _get_record_index()
+
+    assert record_index.record_type[0] == RECORD_TYPE_ENTITY
+    assert record_index.record_type[2] == RECORD_TYPE_RELATIONSHIP
+    assert record_index.get_record_type(1) == "person"
+    assert record_index.get_subtype(0) == {"type": "registeredEntity"}
+    assert record_index.get_subtype(1) == "knownPerson"
+    # The last statement for r1 has no recordDetails
+    assert record_index.get_subtype(2) is None
+    assert record_index.record_types_seen[0] == RECORD_TYPE_SEEN_ENTITY
+    assert (
+        record_index.record_types_seen[2]
+        == RECORD_TYPE_SEEN_RELATIONSHIP | RECORD_TYPE_SEEN_OTHER
+    )
+    assert record_index.record_types_seen[3] == 0
+    assert record_index.get_record_types_not_entity_or_person(0) == []
+    assert record_index.get_record_types_not_entity_or_person(2) == [
+        "relationship",
+        "weird",
+        "relationship",
+    ]
+
+
+def test_value_table():
+
+    values = ValueTable()
+
+    assert values.add(None) == 0
+    assert values.add("entity") == RECORD_TYPE_ENTITY
+    number = values.add({"type": "arrangement", "subtype": "trust"})
+    assert values.add({"subtype": "trust", "type": "arrangement"}) == number
+    assert values.get(number) == {"type": "arrangement", "subtype": "trust"}
+    assert len({values.add(1), values.add(1.0), values.add(True)}) == 3
+
+
+def test_record_column():
+
+    column = RecordColumn("b", default=-1)
+
+    assert column[5] == -1
+    assert len(column) == 0
+    column[2] = 3
+    assert len(column) == 3
+    assert column.array.tolist() == [-1, -1, 3]
+    assert column[2] == 3
@@ -1,6 +1,12 @@
 import os
 import tempfile
 
+import ijson  # type: ignore
+import pytest
+
+import libcovebods.config
+import libcovebods.data_reader
+import libcovebods.schema
 from tests.api import bods_json_output
 
 
@@ -22,3 +28,90 @@ def test_sample_mode_valid_1():
     assert results["validation_errors_count"] == 0
     assert results["additional_fields_count"] == 0
     assert results["additional_checks_count"] == 0
+
+
+def test_sample_mode_full_file_counts_1():
+
+    cove_temp_folder = tempfile.mkdtemp(
+        prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()
+    )
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        "0.4",
+        "sample_300_statements.json",
+    )
+
+    results = bods_json_output(
+        cove_temp_folder, json_filename, sample_mode=True, full_file_counts=True
+    )
+
+    # Statistics describe the sample ...
+    assert results["statistics"]["count_entity_statements"] == 50
+    # ... and the full file counts describe the whole file
+    assert results["full_file_counts"] == {
+        "count_statements": 300,
+        "count_statement_types": {
+            "entityStatement": 100,
+            "personStatement": 100,
+            "ownershipOrControlStatement": 100,
+            "unknown": 0,
+        },
+        "count_record_types": {"entity": 100, "person": 100, "relationship": 100},
+        "count_record_statuses": {"new": 300, "updated": 0, "closed": 0},
+        "file_size_bytes": os.path.getsize(json_filename),
+    }
+
+
+def _write_temp_file(content):
+    filename = os.path.join(
+        tempfile.mkdtemp(prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()),
+        "data.json",
+    )
+    with open(filename, "wb") as fp:
+        fp.write(content)
+    return filename
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"   \n", b"this is not JSON", b'{"statementId": "1", "recordT'],
+)
+@pytest.mark.parametrize("sample_mode_method", ["first", "reservoir", "jump"])
+def test_sample_mode_bad_input(content, sample_mode_method):
+    data_reader = libcovebods.data_reader.DataReader(
+        _write_temp_file(content),
+        sample_mode=True,
+        sample_mode_method=sample_mode_method,
+    )
+
+    with pytest.raises(ijson.JSONError):
+        libcovebods.schema.SchemaBODS(
+            data_reader, libcovebods.config.LibCoveBODSConfig()
+        )
+
+
+def test_sample_mode_bad_input_full_output():
+    cove_temp_folder = tempfile.mkdtemp(
+        prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()
+    )
+
+    with pytest.raises(ijson.JSONError):
+        bods_json_output(
+            cove_temp_folder, _write_temp_file(b"this is not JSON"), sample_mode=True
+        )
+
+
+@pytest.mark.parametrize("sample_mode_method", ["first", "reservoir", "jump"])
+def test_sample_mode_complete_object(sample_mode_method):
+    # A complete JSON value that isn't a list has no statements, as it always has
+    data_reader = libcovebods.data_reader.DataReader(
+        _write_temp_file(b'{"statementId": "1"}'),
+        sample_mode=True,
+        sample_mode_method=sample_mode_method,
+    )
+
+    assert data_reader.get_top_level_type() == (
+        libcovebods.data_reader.TOP_LEVEL_TYPE_OBJECT
+    )
+    assert data_reader.get_all_data() == []
@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import tempfile
+
+import libcovebods.config
+import libcovebods.data_reader
+import libcovebods.jsonschemavalidate
+import libcovebods.schema
+import libcovebods.schema_dir
+from libcovebods.schema_dir import (
+    check_schema_files,
+    clear_schema_cache,
+    get_component_index,
+    get_scheme_file_data,
+    schema_registry,
+)
+
+
+def _get_schema(version):
+    json_filename = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "fixtures",
+        version,
+        "basic_1.json",
+    )
+    return libcovebods.schema.SchemaBODS(
+        libcovebods.data_reader.DataReader(json_filename)
+    )
+
+
+def test_schema_registry_is_shared_1():
+
+    schema_1 = _get_schema("0.4")
+    schema_2 = _get_schema("0.4")
+
+    assert schema_1._pkg_schema_obj is schema_2._pkg_schema_obj
+
+
+def test_schema_file_data_is_shared_1():
+
+    schema_1 = _get_schema("0.2")
+    schema_2 = _get_schema("0.2")
+
+    assert schema_1._pkg_schema_obj is schema_2._pkg_schema_obj
+    assert schema_1.get_entity_statement_types_list() == [
+        "registeredEntity",
+        "legalEntity",
+        "arrangement",
+        "anonymousEntity",
+        "unknownEntity",
+    ]
+
+
+def test_schema_cache_notices_changes_1():
+
+    schema_dir = os.path.join(
+        tempfile.mkdtemp(prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()),
+        "schema",
+    )
+    shutil.copytree(
+        libcovebods.config.LibCoveBODSConfig().config["schema_versions"]["0.4"][
+            "schema_url"
+        ],
+        schema_dir,
+    )
+
+    registry = schema_registry(schema_dir)
+    entity_schema = get_scheme_file_data(schema_dir, "entity")
+    assert registry is schema_registry(schema_dir)
+    assert entity_schema is get_scheme_file_data(schema_dir, "entity")
+
+    # Change a file
+    entity_filename = os.path.join(schema_dir, "entity-record.json")
+    with open(entity_filename) as fp:
+        data = json.load(fp)
+    data["properties"]["entityType"]["properties"]["type"]["enum"].append("newType")
+    with open(entity_filename, "w") as fp:
+        json.dump(data, fp)
+
+    # Nothing looks at the files until they are checked
+    assert registry is schema_registry(schema_dir)
+    check_schema_files(schema_dir)
+    assert registry is not schema_registry(schema_dir)
+    assert (
+        "newType"
+        in get_scheme_file_data(schema_dir, "entity")["properties"]["entityType"][
+            "properties"
+        ]["type"]["enum"]
+    )
+
+    # Clearing the cache loads things again
+    registry = schema_registry(schema_dir)
+    clear_schema_cache()
+    assert registry is not schema_registry(schema_dir)
+
+
+def test_component_index_04():
+
+    schema_dir = libcovebods.config.LibCoveBODSConfig().config["schema_versions"][
+        "0.4"
+    ]["schema_url"]
+
+    index = get_component_index(schema_dir)
+    assert index is get_component_index(schema_dir)
+
+    entity_schema = get_scheme_file_data(schema_dir, "entity")
+    assert entity_schema is index.get("entity")
+    assert index.entity_types == tuple(
+        entity_schema["properties"]["entityType"]["properties"]["type"]["enum"]
+    )
+    assert "registeredEntity" in index.entity_types_set
+    assert "knownPerson" in index.person_types_set
+    assert "shareholding" in index.interest_types_set
+    assert index.interest_direct_or_indirect_set == {"direct", "indirect", "unknown"}
+    assert "isPep" in index.political_exposure_statuses_set
+    assert index.get("not-a-component") is None
+
+
+def test_component_index_lists_match_schema_04():
+
+    schema = _get_schema("0.4")
+
+    assert schema.get_entity_statement_types_list() == list(
+        get_component_index(schema.pkg_schema_url).entity_types
+    )
+    # Callers get their own list, so can't change the shared index
+    types = schema.get_person_statement_types_list()
+    types.append("newType")
+    assert "newType" not in schema.get_person_statement_types_list()
+
+
+def test_schema_cache_hits_dont_look_at_files(monkeypatch):
+
+    schema_dir = libcovebods.config.LibCoveBODSConfig().config["schema_versions"][
+        "0.4"
+    ]["schema_url"]
+    schema_registry(schema_dir)
+
+    def get_stamp(path):
+        raise AssertionError("The file system was looked at")
+
+    monkeypatch.setattr(libcovebods.schema_dir, "_get_stamp", get_stamp)
+
+    schema_registry(schema_dir)
+    get_component_index(schema_dir)
+
+
+def test_schema_files_checked_once_per_schema(monkeypatch):
+
+    libcovebods.jsonschemavalidate.JSONSchemaValidator(
+        _get_schema("0.4")
+    )._get_validator()
+    stamp_paths = []
+    get_stamp = libcovebods.schema_dir._get_stamp
+
+    def counting_get_stamp(path):
+        stamp_paths.append(path)
+        return get_stamp(path)
+
+    monkeypatch.setattr(libcovebods.schema_dir, "_get_stamp", counting_get_stamp)
+
+    schema = _get_schema("0.4")
+    schema.get_entity_statement_types_list()
+    schema._pkg_schema_obj
+    libcovebods.jsonschemavalidate.JSONSchemaValidator(schema)._get_validator()
+
+    assert len(stamp_paths) == 1
@@ -0,0 +1,60 @@
+import pytest
+
+import libcovebods.config
+from libcovebods.schema_facts import SchemaFacts, get_schema_facts
+
+
+def _get_facts(version):
+    config = libcovebods.config.LibCoveBODSConfig().config
+    return get_schema_facts(version, config["schema_versions"][version]["schema_url"])
+
+
+@pytest.mark.parametrize("version", ["0.2", "0.3", "0.4"])
+def test_schema_facts(version):
+
+    facts = _get_facts(version)
+
+    assert isinstance(facts, SchemaFacts)
+    assert facts is _get_facts(version)
+    assert facts.schema_version == version
+    assert facts.version_tuple == tuple(int(i) for i in version.split("."))
+    assert "registeredEntity" in facts.entity_types
+    assert facts.entity_types_set == set(facts.entity_types)
+    assert "knownPerson" in facts.person_types_set
+    assert "shareholding" in facts.interest_types_set
+    assert facts.address_types_allowed_in_person_statement == (
+        "placeOfBirth",
+        "residence",
+        "service",
+        "alternative",
+    )
+    assert "/statementDate" in facts.package_schema_fields
+
+
+def test_schema_facts_version_specific():
+
+    assert _get_facts("0.2").interest_direct_or_indirect == ()
+    assert _get_facts("0.2").political_exposure_statuses == ()
+    assert _get_facts("0.3").interest_direct_or_indirect_set == {
+        "direct",
+        "indirect",
+        "unknown",
+    }
+    assert "isPep" in _get_facts("0.3").political_exposure_statuses_set
+    assert "isPep" in _get_facts("0.4").political_exposure_statuses_set
+
+
+def test_schema_facts_read_only():
+
+    facts = _get_facts("0.4")
+
+    with pytest.raises(AttributeError):
+        facts.entity_types = ()
+    with pytest.raises(AttributeError):
+        del facts.entity_types
+
+
+def test_schema_facts_http_not_supported():
+
+    with pytest.raises(NotImplementedError):
+        get_schema_facts("0.4", "https://example.com/schema/")
@@ -0,0 +1,257 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+import libcovebods.data_reader
+import libcovebods.statement_index
+from libcovebods.statement_index import (
+    StatementIndexError,
+    find_json_array_item_at,
+    find_json_lines_item_at,
+    iter_json_array_spans,
+    iter_json_lines_spans,
+    load_statement_index,
+)
+
+FIXTURES_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "fixtures"
+)
+
+
+def _top_level_array_fixtures():
+    filenames = []
+    for filename in sorted(
+        glob.glob(os.path.join(FIXTURES_DIRECTORY, "**", "*.json"), recursive=True)
+    ):
+        try:
+            with open(filename) as fp:
+                if isinstance(json.load(fp), list):
+                    filenames.append(filename)
+        except ValueError:
+            pass
+    return filenames
+
+
+@pytest.mark.parametrize("json_filename", _top_level_array_fixtures())
+def test_statement_index_matches_json_load(json_filename):
+
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, streaming_mode=True, use_statement_index=True
+    )
+
+    # First read builds the index, second read uses it
+    assert expected == list(data_reader.get_iterator())
+    assert data_reader.get_metadata()["statement_index"]
+    assert expected == list(data_reader.get_iterator())
+    assert len(expected) * 2 == len(data_reader.get_statement_offsets())
+
+
+def test_array_spans_1():
+
+    data = b' [ {"a": "[\\"{,"}, [1, 2],  3 ,"x]" ] '
+
+    spans = list(iter_json_array_spans(data))
+
+    assert [data[start:end] for start, end in spans] == [
+        b'{"a": "[\\"{,"}',
+        b"[1, 2]",
+        b"3",
+        b'"x]"',
+    ]
+
+
+def test_array_spans_empty_1():
+
+    assert [] == list(iter_json_array_spans(b"[ ]"))
+
+
+@pytest.mark.parametrize("data", [b'{"a": 1}', b"[{}, ", b"[{}]]", b"[{}, , {}]"])
+def test_array_spans_bad_1(data):
+
+    with pytest.raises(ValueError):
+        list(iter_json_array_spans(data))
+
+
+def test_array_spans_not_array_1():
+
+    with pytest.raises(StatementIndexError):
+        list(iter_json_array_spans(b'{"a": 1}'))
+
+
+def test_array_spans_small_window_1(monkeypatch):
+
+    # Items bigger than the window, and multi-byte characters cut at the end of a window
+    monkeypatch.setattr(libcovebods.statement_index, "_WINDOW_SIZE", 7)
+    items = [{"name": "Ŧĥé ñämé " * 3, "n": 12345}, 67890, "ü", [1.5, {"a": []}]]
+    data = json.dumps(items, ensure_ascii=False, indent=1).encode("utf-8")
+
+    actual = list(libcovebods.statement_index.iter_json_array_items(data))
+
+    assert [item for _, _, item in actual] == items
+    assert [json.loads(data[start:end]) for start, end, _ in actual] == items
+
+
+@pytest.mark.parametrize("bad_item_index", [1, 150])
+@pytest.mark.parametrize("indent", [None, 1])
+def test_array_items_bad_item_in_big_data_1(monkeypatch, bad_item_index, indent):
+
+    # Much bigger than the window, with a bad item near the start or a few windows in
+    monkeypatch.setattr(libcovebods.statement_index, "_WINDOW_SIZE", 1000)
+    items = [
+        {"statementId": str(i), "name": "Ŧĥé ñämé", "n": [i, i + 1]} for i in range(200)
+    ]
+    data = json.dumps(items, ensure_ascii=False, indent=indent).replace(
+        '"statementId": "%d"' % bad_item_index,
+        '"statementId" "%d"' % bad_item_index,
+    )
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(data)
+    read_sizes = []
+    read = libcovebods.statement_index._BufferSource.read
+
+    def recording_read(self, start, size):
+        read_sizes.append(size)
+        return read(self, start, size)
+
+    monkeypatch.setattr(
+        libcovebods.statement_index._BufferSource, "read", recording_read
+    )
+
+    with pytest.raises(json.JSONDecodeError) as actual:
+        list(libcovebods.statement_index.iter_json_array_items(data.encode("utf-8")))
+
+    assert str(expected.value) == str(actual.value)
+    assert (expected.value.pos, expected.value.lineno, expected.value.colno) == (
+        actual.value.pos,
+        actual.value.lineno,
+        actual.value.colno,
+    )
+    # The window is not grown to try to fit the bad item in
+    assert max(read_sizes) == 1000
+
+
+def test_json_lines_spans_1():
+
+    data = b'{"a": 1}\n\n  {"b": 2}\r\n{"c": 3}'
+
+    spans = list(iter_json_lines_spans(data))
+
+    assert [json.loads(data[start:end]) for start, end in spans] == [
+        {"a": 1},
+        {"b": 2},
+        {"c": 3},
+    ]
+
+
+def test_find_json_array_item_at_1():
+
+    data = (
+        b'[{"statementId": "1", "x": ", {\\"statementId\\": \\"no\\"}", "y": [{"a": 1}]},\n'
+        b' {"statementId": "2"}]'
+    )
+
+    # Braces in strings and nested objects are skipped
+    for offset in range(2, data.index(b' {"statementId": "2"}')):
+        start, end, item = find_json_array_item_at(data, offset)
+        assert {"statementId": "2"} == item
+        assert item == json.loads(data[start:end])
+    assert "1" == find_json_array_item_at(data, 0)[2]["statementId"]
+    assert "1" == find_json_array_item_at(data, 1)[2]["statementId"]
+    assert find_json_array_item_at(data, len(data) - 3) is None
+
+
+def test_find_json_lines_item_at_1():
+
+    data = b'{"a": 1}\n\n  {"b": 2}\n{"c": 3}'
+
+    assert {"a": 1} == find_json_lines_item_at(data, 0)[2]
+    assert {"b": 2} == find_json_lines_item_at(data, 1)[2]
+    assert {"b": 2} == find_json_lines_item_at(data, 9)[2]
+    assert {"c": 3} == find_json_lines_item_at(data, 13)[2]
+    assert find_json_lines_item_at(data, len(data) - 1) is None
+
+
+def test_get_statement_1():
+
+    json_filename = os.path.join(FIXTURES_DIRECTORY, "0.4", "basic_1.json")
+    with open(json_filename) as fp:
+        expected = json.load(fp)
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, use_statement_index=True
+    )
+
+    assert expected[2] == data_reader.get_statement(2)
+    assert expected[0] == data_reader.get_statement(0)
+    # Building the index does not keep the data
+    assert data_reader.parse_count == 0
+
+
+def test_json_lines_statement_index_1():
+
+    json_lines_filename = os.path.join(
+        FIXTURES_DIRECTORY, "0.4", "basic_1_with_bad_line.jsonl"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_lines_filename, use_statement_index=True
+    )
+
+    assert 3 == len(data_reader.get_all_data())
+    assert [2] == [e["line"] for e in data_reader.get_parse_errors()]
+    # Every line with something on it is indexed, including the bad one
+    assert 8 == len(data_reader.get_statement_offsets())
+
+
+def test_statement_index_not_used_if_compressed_or_not_array_1():
+
+    json_filename = os.path.join(
+        FIXTURES_DIRECTORY, "0.4", "invalid-schema", "statements_not_array.json"
+    )
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, streaming_mode=True, use_statement_index=True
+    )
+
+    assert 1 == len(list(data_reader.get_iterator()))
+    assert data_reader.get_statement_offsets() is None
+
+
+def test_save_statement_index_1():
+
+    temp_folder = tempfile.mkdtemp(
+        prefix="lib-cove-bods-tests-", dir=tempfile.gettempdir()
+    )
+    json_filename = os.path.join(temp_folder, "basic_1.json")
+    shutil.copy(os.path.join(FIXTURES_DIRECTORY, "0.4", "basic_1.json"), json_filename)
+
+    data_reader = libcovebods.data_reader.DataReader(
+        json_filename, use_statement_index=True, save_statement_index=True
+    )
+    offsets = data_reader.get_statement_offsets()
+
+    assert os.path.exists(json_filename + ".bodsidx")
+
+    second_data_reader = libcovebods.data_reader.DataReader(
+        json_filename, use_statement_index=True
+    )
+
+    assert offsets == second_data_reader.get_statement_offsets()
+
+    # If the file changes, the saved index is not used
+    with open(json_filename, "a") as fp:
+        fp.write("\n")
+
+    third_data_reader = libcovebods.data_reader.DataReader(
+        json_filename, use_statement_index=True
+    )
+
+    assert load_statement_index(json_filename + ".bodsidx", json_filename) is None
+    assert offsets == third_data_reader.get_statement_offsets()
@@ -0,0 +1,51 @@
+import pytest
+
+import libcovebods.config
+import libcovebods.schema
+from libcovebods.utils import (
+    STATEMENT_TYPE_CODE_ENTITY,
+    STATEMENT_TYPE_CODE_OTHER,
+    STATEMENT_TYPE_CODE_OWNERSHIP_OR_CONTROL,
+    STATEMENT_TYPE_CODE_PERSON,
+    get_statement_type,
+    get_statement_type_classifier,
+)
+
+STATEMENT_TYPE_CODES = {
+    "entityStatement": STATEMENT_TYPE_CODE_ENTITY,
+    "personStatement": STATEMENT_TYPE_CODE_PERSON,
+    "ownershipOrControlStatement": STATEMENT_TYPE_CODE_OWNERSHIP_OR_CONTROL,
+}
+
+STATEMENTS = [
+    {},
+    {"statementType": "entityStatement"},
+    {"statementType": "personStatement"},
+    {"statementType": "ownershipOrControlStatement"},
+    {"statementType": "somethingElse"},
+    {"statementType": ["entityStatement"]},
+    {"recordType": "entity"},
+    {"recordType": "person"},
+    {"recordType": "relationship"},
+    {"recordType": "entityStatement"},
+    {"recordType": None},
+    {"recordType": {"type": "entity"}},
+]
+
+
+@pytest.mark.parametrize("version", ["0.2", "0.3", "0.4"])
+@pytest.mark.parametrize("statement", STATEMENTS)
+def test_statement_type_classifier_matches_get_statement_type(version, statement):
+
+    config = libcovebods.config.LibCoveBODSConfig()
+    schema_object = libcovebods.schema.SchemaBODS(lib_cove_bods_config=config)
+    schema_object.schema_version = version
+
+    classify_statement = get_statement_type_classifier(schema_object)
+
+    statement_type = get_statement_type(statement, schema_object)
+    expected = STATEMENT_TYPE_CODE_OTHER
+    for name, code in STATEMENT_TYPE_CODES.items():
+        if statement_type == name:
+            expected = code
+    assert classify_statement(statement) == expected